@@ -41,6 +41,7 @@ const AdminDashboard = () => {
     medicalBotalldata: [],
     mentalHealthDistribution: [],
     mentalalldata: [],
+    recordCursors: {},
     mentalScores: [],
     diseaseRiskLevels: [],
     feedbackSentiment: [],
@@ -131,6 +132,7 @@ const AdminDashboard = () => {
         feedbackalldata: result.analytics?.feedbackalldata || [],
         mentalHealthDistribution: result.analytics?.mentalHealthDistribution || [],
         mentalalldata: result.analytics?.mentalalldata || [],
+        recordCursors: result.analytics?.recordCursors || {},
         mentalScores: result.analytics?.mentalHealthDistribution || [],
         diseaseRiskLevels: result.analytics?.diseaseRiskLevels || [],
         feedbackSentiment: result.analytics?.feedbackSentiment || [],
@@ -0,0 +1,38 @@
+import axios from 'axios';
+import { RecordSource } from './types';
+
+const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
+
+// Largest page /admin/records accepts, so a full table takes the fewest requests.
+const RECORDS_PAGE_SIZE = 500;
+
+export interface RecordFilters {
+  start_date?: string;
+  end_date?: string;
+  gender?: 'All' | 'Male' | 'Female';
+  cursor?: string;
+}
+
+// Follow next_cursor through /admin/records/<source> until the last page,
+// handing each page to onPage as it arrives. Pass a cursor (e.g. from
+// recordCursors) to continue after rows that are already shown. Stops early
+// once isCancelled() returns true.
+export async function fetchAllRecords<T>(
+  source: RecordSource,
+  filters: RecordFilters,
+  onPage: (records: T[]) => void = () => {},
+  isCancelled: () => boolean = () => false,
+): Promise<T[]> {
+  const all: T[] = [];
+  let params: RecordFilters & { page_size: number } = { ...filters, page_size: RECORDS_PAGE_SIZE };
+  while (!isCancelled()) {
+    const response = await axios.get(`${apiUrl}/admin/records/${source}`, { params });
+    if (isCancelled()) break;
+    const records: T[] = response.data.records || [];
+    all.push(...records);
+    onPage(records);
+    if (!response.data.next_cursor) break;
+    params = { cursor: response.data.next_cursor, page_size: RECORDS_PAGE_SIZE };
+  }
+  return all;
+}
@@ -6,6 +6,7 @@ import LineChartComponent from '../charts/LineChartComponent';
 import PieChartComponent from '../charts/PieChartComponent';
 import { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllRecords } from '../records';
 
 const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
 
@@ -53,18 +54,23 @@ export default function DiseasePredictorTab({
   };
 
   useEffect(() => {
+    let cancelled = false;
     const fetchAllData = async () => {
       setIsLoading({ ...isLoading, riskLevelsTable: true });
       try {
         const thirtyDaysAgo = new Date();
         thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
-        const response = await axios.post(`${apiUrl}/admin/stats`, {
+        // Show the first page right away and append the rest as it arrives
+        let firstPage = true;
+        await fetchAllRecords<Diseasealldata>('disease', {
           start_date: thirtyDaysAgo.toISOString().replace('Z', '+00:00'),
           end_date: new Date().toISOString().replace('Z', '+00:00'),
           gender: 'All',
-        });
-        const analytics = response.data.analytics || {};
-        setFilteredalldata(analytics.diseasealldata || []);
+        }, (records) => {
+          const replace = firstPage;
+          firstPage = false;
+          setFilteredalldata((prev) => (replace ? records : [...prev, ...records]));
+        }, () => cancelled);
       } catch (error: any) {
         console.error('Error fetching all disease data:', error);
         setErrors({ ...errors, riskLevelsTable: 'Failed to fetch all disease data. Showing fallback data.' });
@@ -74,6 +80,9 @@ export default function DiseasePredictorTab({
       }
     };
     fetchAllData();
+    return () => {
+      cancelled = true;
+    };
   // Fetch initial table data once when the tab mounts.
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
@@ -89,6 +98,7 @@ export default function DiseasePredictorTab({
         : new Date().toISOString().replace('Z', '+00:00');
       const response = await axios.post(`${apiUrl}/admin/stats`, {
         ...params,
+        sections: ['disease'],
         start_date: startDate,
         end_date: endDate,
       });
@@ -166,7 +176,7 @@ export default function DiseasePredictorTab({
               </thead>
               <tbody>
                 {filteredalldata.length > 0 ? (
-                  [...filteredalldata].reverse().map((alldata, i) => (
+                  filteredalldata.map((alldata, i) => (
                     <tr key={i} className="bg-[#1e1e2d] hover:bg-[#282A3A]">
                       <td className="p-2 border-b border-[#735F32]">{alldata.date || 'N/A'}</td>
                       <td className="p-2 border-b border-[#735F32]">{alldata.userName || 'Anonymous'}</td>
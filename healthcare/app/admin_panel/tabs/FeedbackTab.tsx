@@ -1,10 +1,11 @@
 'use client';
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import { Card, CardContent } from '../../ui/card';
 import { StatItem, DashboardData, FeedbackItem, FeedbackAllData, FeedbackSentiment } from '../types';
 import { Reply, Send, Loader2 } from 'lucide-react';
 import PieChartComponent from '../charts/PieChartComponent';
 import toast from 'react-hot-toast';
+import { fetchAllRecords } from '../records';
 
 interface FeedbackItemProps {
   feedback: FeedbackItem;
@@ -142,8 +143,23 @@ export default function FeedbackTab({
   data: DashboardData;
   onReplySubmit: (feedbackId: string, message: string) => Promise<boolean>;
 }) {
-  const [feedbackAllData] = useState<FeedbackAllData[]>(data.feedbackalldata || []);
+  const [feedbackAllData, setFeedbackAllData] = useState<FeedbackAllData[]>(data.feedbackalldata || []);
   const [feedbackSentiment] = useState<FeedbackSentiment>(data.feedbackSentiment || []);
+  // /admin/stats embeds only the first page of the table; load the rest
+  useEffect(() => {
+    let cancelled = false;
+    const cursor = data.recordCursors?.feedback;
+    setFeedbackAllData(data.feedbackalldata || []);
+    if (cursor) {
+      fetchAllRecords<FeedbackAllData>('feedback', { cursor }, (records) => {
+        setFeedbackAllData((prev) => [...prev, ...records]);
+      }, () => cancelled).catch((error) => console.error('Error fetching feedback records:', error));
+    }
+    return () => {
+      cancelled = true;
+    };
+  }, [data.feedbackalldata, data.recordCursors]);
+
   const hasFeedback = data.feedbackComments && data.feedbackComments.length > 0;
   const hasSentimentData = feedbackSentiment.some(item => item.count > 0);
   const displayPieChartData = !hasSentimentData && hasFeedback
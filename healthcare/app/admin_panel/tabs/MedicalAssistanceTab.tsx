@@ -7,6 +7,7 @@ import { useState, useEffect } from 'react';
 import { auth, db } from '../../firebase/config';
 import { doc, getDoc } from 'firebase/firestore';
 import axios from 'axios';
+import { fetchAllRecords } from '../records';
 
 interface Trend {
   count: number;
@@ -46,7 +47,7 @@ export default function MedicalAssistanceTab({
   const [timeframe, setTimeframe] = useState<'Today' | 'Overall'>('Overall');
   const [gender, setGender] = useState<'All' | 'Male' | 'Female'>('All');
   const [filteredTrends, setFilteredTrends] = useState<Trend[]>(data.medicalBotTrends || []);
-  const [medicalData] = useState<MedicalBotAllData[]>(data.medicalBotalldata || []);
+  const [medicalData, setMedicalData] = useState<MedicalBotAllData[]>(data.medicalBotalldata || []);
   const [filteredCategories, setFilteredCategories] = useState<Category[]>(data.medicalBotCategories);
   const [isLoading, setIsLoading] = useState(false);
   const [expandedRows, setExpandedRows] = useState<number[]>([]);
@@ -65,6 +66,21 @@ export default function MedicalAssistanceTab({
     fetchUser();
   }, []);
 
+  // /admin/stats embeds only the first page of the table; load the rest
+  useEffect(() => {
+    let cancelled = false;
+    const cursor = data.recordCursors?.['medical-bot'];
+    setMedicalData(data.medicalBotalldata || []);
+    if (cursor) {
+      fetchAllRecords<MedicalBotAllData>('medical-bot', { cursor }, (records) => {
+        setMedicalData((prev) => [...prev, ...records]);
+      }, () => cancelled).catch((error) => console.error('Error fetching medical assistance records:', error));
+    }
+    return () => {
+      cancelled = true;
+    };
+  }, [data.medicalBotalldata, data.recordCursors]);
+
   useEffect(() => {
     if (timeframe === 'Today') {
       const todayData = (data.medicalBotTrends || []).filter((trend) =>
@@ -89,6 +105,7 @@ export default function MedicalAssistanceTab({
 
         const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
         const response = await axios.post(`${apiUrl}/admin/stats`, {
+          sections: ['medical_bot'],
           gender,
           start_date: startDate,
           end_date: endDate,
@@ -6,9 +6,13 @@ import LineChartComponent from '../charts/LineChartComponent';
 import PieChartComponent from '../charts/PieChartComponent';
 import BarChartComponent from '../charts/BarChartComponent';
 import axios from 'axios';
+import { fetchAllRecords } from '../records';
 
 const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
 
+// Only the /admin/stats sections this tab shows, so a filter change runs just their scans
+const MENTAL_HEALTH_SECTIONS = ['mental_health', 'mental_health_records'];
+
 export default function MentalHealthTab({ stats, data }: { stats: StatItem; data: DashboardData }) {
   const [mentalData, setMentalData] = useState<mentalData[]>(data.mentalalldata || []);
   const [mentalTrends, setMentalTrends] = useState(data.mentalHealthTrends || []);
@@ -59,6 +63,13 @@ export default function MentalHealthTab({ stats, data }: { stats: StatItem; data
     return wordArray.length > 0 ? wordArray : [{ name: 'No Data', count: 1 }]; // Fallback if no words found
   };
 
+  // /admin/stats embeds only the first page of rows; the table and common words need all of them
+  const loadAllMentalData = async (analytics: any): Promise<mentalData[]> => {
+    const firstPage: mentalData[] = analytics.mentalalldata || [];
+    const cursor = analytics.recordCursors?.['mental-health'];
+    return cursor ? [...firstPage, ...(await fetchAllRecords<mentalData>('mental-health', { cursor }))] : firstPage;
+  };
+
   const fetchMentalHealthData = async () => {
     try {
       setIsLoading(true);
@@ -69,13 +80,14 @@ export default function MentalHealthTab({ stats, data }: { stats: StatItem; data
       startDate.setDate(currentDate.getDate() - 30);
 
       const response = await axios.post(`${apiUrl}/admin/stats`, {
+        sections: MENTAL_HEALTH_SECTIONS,
         start_date: startDate.toISOString().replace('Z', '+00:00'),
         end_date: currentDate.toISOString().replace('Z', '+00:00'),
         gender: 'All',
       });
 
       const analytics = response.data.analytics || {};
-      const newMentalData = analytics.mentalalldata || [];
+      const newMentalData = await loadAllMentalData(analytics);
       setMentalData(newMentalData);
       setMentalTrends(analytics.mentalHealthTrends || []);
       setMentalScores(analytics.mentalHealthDistribution || []);
@@ -100,6 +112,7 @@ export default function MentalHealthTab({ stats, data }: { stats: StatItem; data
       startDate.setDate(currentDate.getDate() - 30);
 
       const response = await axios.post(`${apiUrl}/admin/stats`, {
+        sections: MENTAL_HEALTH_SECTIONS,
         start_date: startDate.toISOString().replace('Z', '+00:00'),
         end_date: currentDate.toISOString().replace('Z', '+00:00'),
         gender: gender,
@@ -107,7 +120,7 @@ export default function MentalHealthTab({ stats, data }: { stats: StatItem; data
 
       const analytics = response.data.analytics || {};
       setMentalScores(analytics.mentalHealthDistribution || []);
-      const newMentalData = analytics.mentalalldata || []; // Update mentalData with filtered data
+      const newMentalData = await loadAllMentalData(analytics); // Update mentalData with filtered data
       setMentalData(newMentalData);
       const commonWordsData = extractCommonWords(newMentalData); // Recompute common words
       setCommonWords(commonWordsData);
@@ -167,6 +167,12 @@ export interface MedicalBotAllData {
   categroryQuestion?: string;
 }
 
+// Sources served page by page from /admin/records/<source>
+export type RecordSource = 'disease' | 'mental-health' | 'medical-bot' | 'feedback';
+
+// next_cursor of the first page embedded in /admin/stats, per source (null when it was the only page)
+export type RecordCursors = Partial<Record<RecordSource, string | null>>;
+
 export interface UserInsight {
   active_today: number;
   active_week: number;
@@ -189,7 +195,8 @@ export interface DashboardData {
   medicalBotalldata: MedicalBotAllData[];
   feedbackalldata: FeedbackAllData[];
   mentalalldata: MentalData[];
-  
+  recordCursors?: RecordCursors;
+
   mentalScores: ValueData;
   mentalHealthDistribution: ValueData;
   diseaseRiskLevels: RiskLevelData;
@@ -0,0 +1,91 @@
+"""Peak memory of the disease analytics builder as the range grows.
+
+Seeds synthetic 'Disease Predictor' collections of increasing size and
+reports, with tracemalloc, the peak of a gender-filtered
+get_enhanced_disease_analytics over each, next to the peak of the bare paged
+scan it reads from (the fake's own copies) and the memory a list of every
+projected table row would hold, as the builders kept before they streamed.
+
+    python -m benchmarks.bench_analytics_memory [--docs 2500 10000 20000] [--days 90]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from benchmarks.fake_firestore import FakeFirestore, FakeSnapshot
+from benchmarks.harness import load_server
+
+def seed(db, tz, docs, days):
+    rnd = random.Random(7)
+    now = datetime.now(tz)
+    diseases = ['Flu', 'Common Cold', 'Migraine', 'Diabetes', 'Hypertension', 'Asthma', 'Allergy', 'Gastritis']
+    doctors = ['General Physician', 'Neurologist', 'Endocrinologist', 'Cardiologist', 'Pulmonologist']
+    for i in range(docs):
+        db.collection('Disease Predictor').add({
+            'serialNo': i,
+            'userName': f'user{rnd.randrange(2000)}',
+            'gender': rnd.choice(['Male', 'Female']),
+            'date': now - timedelta(seconds=rnd.randrange(days * 86400)),
+            'disease': rnd.choice(diseases),
+            'doctor': rnd.choice(doctors),
+            'cures': 'Rest, fluids and paracetamol',
+            'riskLevel': rnd.choice(['Low', 'Medium', 'High']),
+            'inputDescription': f'fever and headache for {rnd.randrange(1, 10)} days, mild cough',
+        })
+
+def decoded(snapshot):
+    """Document data with fresh string objects, as the Firestore client decodes each document"""
+    return {key: ''.join(value) if isinstance(value, str) else value for key, value in snapshot._data.items()}
+
+def measured(fn):
+    """Return (peak traced bytes, bytes still held by the result) of ``fn()``"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, held
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, nargs='+', default=[2500, 10000, 20000])
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    server, _ = load_server()
+    server.ROLLUPS_ENABLED = False
+    user_names = frozenset(f'user{i}' for i in range(0, 2000, 2))
+    print(f"{'documents':>10} {'scan peak':>12} {'builder peak':>14} {'builder extra':>15} {'rows held':>12}")
+    for docs in args.docs:
+        db = server.db = FakeFirestore()
+        seed(db, server.tz, docs, args.days)
+        end = datetime.now(server.tz)
+        start = end - timedelta(days=args.days)
+        query = db.collection('Disease Predictor').where('date', '>=', start).where('date', '<=', end) \
+            .where('gender', '==', 'Male').order_by('date')
+
+        def scan():
+            for doc in server.iter_documents(query, fields=server.DISEASE_ANALYTICS_FIELDS):
+                doc.to_dict()
+
+        def build():
+            return server.get_enhanced_disease_analytics(start, end, 'Male', 'POST', user_names)
+
+        def rows():
+            return [{column: data.get(column) for column in server.DISEASE_COLUMNS}
+                    for data in (doc.to_dict() for doc in server.iter_documents(query))
+                    if data.get('userName') in user_names]
+
+        with patch.object(FakeSnapshot, 'to_dict', decoded):
+            scan_peak, _ = measured(scan)
+            builder_peak, _ = measured(build)
+            _, rows_held = measured(rows)
+        print(f"{docs:>10} {scan_peak / 2**20:>8.1f} MiB {builder_peak / 2**20:>10.1f} MiB "
+              f"{(builder_peak - scan_peak) / 2**20:>11.2f} MiB {rows_held / 2**20:>8.1f} MiB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Size and encoding time of disease records: row objects vs columnar JSON.
+
+Builds synthetic 'Disease Predictor' rows and encodes them three ways: the row
+format through jsonify (one object per row), the columnar format through the
+standard json encoder, and the columnar format through orjson (if installed),
+which is what /admin/records?format=columnar serves.
+
+    python -m benchmarks.bench_columnar_records [--rows 20000]
+"""
+import argparse
+import gzip
+import json
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.harness import load_server, timed
+
+def make_rows(tz, count):
+    rnd = random.Random(7)
+    now = datetime.now(tz)
+    diseases = ['Flu', 'Common Cold', 'Migraine', 'Diabetes', 'Hypertension', 'Asthma', 'Allergy', 'Gastritis']
+    doctors = ['General Physician', 'Neurologist', 'Endocrinologist', 'Cardiologist', 'Pulmonologist']
+    return [{
+        'date': now - timedelta(seconds=rnd.randrange(90 * 86400)),
+        'cures': 'Rest, fluids and paracetamol',
+        'doctor': rnd.choice(doctors),
+        'disease': rnd.choice(diseases),
+        'userName': f'user{rnd.randrange(2000)}',
+        'riskLevel': rnd.choice(['Low', 'Medium', 'High']),
+        'inputDescription': 'fever and headache for two days',
+        'serialNo': i,
+    } for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    server, _ = load_server()
+    spec = server.RECORD_SOURCES['disease']
+    rows = make_rows(server.tz, args.rows)
+
+    def encode_rows():
+        return server.app.json.dumps({'records': rows, 'next_cursor': None}).encode()
+
+    def encode_columnar_stdlib():
+        payload = server.columnar_records(rows, spec['columns'], spec['dictionary'])
+        return json.dumps(payload, default=server.app.json.default, separators=(',', ':')).encode()
+
+    def encode_columnar():
+        payload = server.columnar_records(rows, spec['columns'], spec['dictionary'])
+        with server.app.app_context():
+            return server.fast_json_response(payload).get_data()
+
+    results = [('rows (jsonify)', *timed(encode_rows)),
+               ('columnar (json)', *timed(encode_columnar_stdlib)),
+               (f"columnar ({'orjson' if server.orjson else 'json fallback'})", *timed(encode_columnar))]
+    base_time, base_body = results[0][1], results[0][2]
+    print(f"rows:                       {args.rows}")
+    for label, elapsed, body in results:
+        print(f"{label + ':':<28}{len(body) / 1024:9.1f} KiB  gzip {len(gzip.compress(body)) / 1024:8.1f} KiB  "
+              f"{elapsed * 1000:8.1f} ms  size {len(base_body) / len(body):4.1f}x  time {base_time / elapsed:5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Day bucketing of event timestamps: per-document strftime vs DayBucketer.
+
+Counts synthetic UTC timestamps per dashboard day three ways: the previous
+``astimezone(tz).strftime`` per document, DayBucketer on epoch seconds (the
+path event_rows uses) and DayBucketer on a ``datetime64`` array. All three
+must produce the same trend.
+
+    python -m benchmarks.bench_day_bucketing [--events 200000] [--days 90]
+"""
+import argparse
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from benchmarks.harness import timed
+from aggregation import CountByDay, DayBucketer
+
+def per_document(dates, tz):
+    counts = Counter(date.astimezone(tz).strftime('%Y-%m-%d') for date in dates)
+    return dict(sorted(counts.items()))
+
+def bucketed(dates, bucketer):
+    epochs = np.array([date.timestamp() for date in dates])
+    counter = CountByDay(field=lambda day: day, label=bucketer.label)
+    for day in bucketer.indexes(epochs).tolist():
+        counter.add(day)
+    return counter.result()
+
+def bucketed_datetime64(values, bucketer):
+    days, counts = np.unique(bucketer.indexes(values), return_counts=True)
+    return {bucketer.label(day): int(count) for day, count in zip(days.tolist(), counts.tolist())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--tz', default='Asia/Karachi')
+    args = parser.parse_args()
+
+    tz = pytz.timezone(args.tz)
+    rnd = random.Random(7)
+    now = datetime.now(pytz.UTC)
+    dates = [now - timedelta(seconds=rnd.randrange(args.days * 86400)) for _ in range(args.events)]
+    values = np.array([date.replace(tzinfo=None) for date in dates], dtype='datetime64[us]')
+    bucketer = DayBucketer(tz, (now - timedelta(days=args.days + 1)).astimezone(tz).date(), now.astimezone(tz).date())
+
+    base_time, expected = timed(per_document, dates, tz)
+    epoch_time, by_epoch = timed(bucketed, dates, bucketer)
+    array_time, by_array = timed(bucketed_datetime64, values, bucketer)
+    assert by_epoch == expected and by_array == expected, 'bucketing disagrees with strftime'
+
+    print(f"events:                     {args.events} over {args.days} days ({args.tz})")
+    print(f"astimezone + strftime:      {base_time * 1000:8.1f} ms")
+    print(f"DayBucketer (epochs):       {epoch_time * 1000:8.1f} ms  {base_time / epoch_time:5.1f}x")
+    print(f"DayBucketer (datetime64):   {array_time * 1000:8.1f} ms  {base_time / array_time:5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Firestore reads of get_medical_bot_analytics for a filtered date range.
+
+Seeds a synthetic 'Medical Assistance Bot' collection spread over a year and
+compares the reads of a 30-day POST request against reading the whole
+collection, which is what the builder did before the range was pushed into
+the query.
+
+    python -m benchmarks.bench_medical_bot_range [--docs 20000] [--days 30]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.harness import load_server, timed
+
+def seed(db, tz, docs, span_days=365):
+    rnd = random.Random(7)
+    now = datetime.now(tz)
+    categories = ['symptoms', 'treatment', 'causes', 'prevention', 'outlook']
+    for i in range(docs):
+        db.collection('Medical Assistance Bot').add({
+            'serialNo': i,
+            'userName': f'user{rnd.randrange(500)}',
+            'date': now - timedelta(seconds=rnd.randrange(span_days * 86400)),
+            'userMessage': 'question',
+            'botResponse': 'answer',
+            'categroryQuestion': rnd.choice(categories),
+        })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    server, db = load_server()
+    server.ROLLUPS_ENABLED = False
+    seed(db, server.tz, args.docs)
+    end = datetime.now(server.tz)
+    start = end - timedelta(days=args.days)
+
+    db.reset_counters()
+    elapsed, result = timed(server.get_medical_bot_analytics, start, end, 'All', 'POST', repeat=1)
+    print(f"collection size:            {args.docs} documents")
+    print(f"full scan (previous):       {args.docs} reads")
+    print(f"range query ({args.days} days):     {db.reads} reads, {sum(day['count'] for day in result['trends'])} events, {elapsed * 1000:.1f} ms")
+    print(f"read reduction:             {args.docs / max(db.reads, 1):.1f}x")
+
+if __name__ == '__main__':
+    main()
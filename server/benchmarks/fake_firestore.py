@@ -0,0 +1,191 @@
+"""In-memory stand-in for the parts of the Firestore client used by server.py.
+
+Only what the analytics code needs is implemented: ``where``/``order_by``/
+``limit``/``start_after``/``select`` queries, ``count()`` aggregations,
+``get_all`` and batched writes. Every document returned to the caller is
+counted in ``reads`` so benchmarks can compare Firestore read costs.
+"""
+import itertools
+from datetime import datetime, timezone
+
+_OPS = {
+    '==': lambda a, b: a == b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '<': lambda a, b: a < b,
+}
+_MISSING = object()
+
+class FakeSnapshot:
+    def __init__(self, collection, doc_id, data, update_time=None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.reference = FakeDocumentRef(collection, doc_id)
+        self.update_time = update_time
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field)
+
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+class FakeAggregationQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self):
+        self._query._collection.db.aggregations += 1
+        return [[FakeAggregation(len(self._query._matches()))]]
+
+class FakeQuery:
+    DESCENDING = 'DESCENDING'
+    ASCENDING = 'ASCENDING'
+
+    def __init__(self, collection, filters=(), orders=(), limit=None, cursor=None, fields=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     cursor=self._cursor, fields=self._fields)
+        state.update(changes)
+        return FakeQuery(self._collection, **state)
+
+    def where(self, field=None, op=None, value=None, filter=None):
+        if filter is not None:
+            field, op, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self)
+
+    def _matches(self):
+        rows = []
+        for doc_id, data in self._collection.docs.items():
+            ok = True
+            for field, op, value in self._filters:
+                current = data.get(field, _MISSING)
+                if current is _MISSING or type(current) is not type(value) and not (
+                        isinstance(current, datetime) and isinstance(value, datetime)):
+                    ok = False
+                    break
+                if not _OPS[op](current, value):
+                    ok = False
+                    break
+            if ok and all(field in data or field == '__name__' for field, _ in self._orders):
+                rows.append((doc_id, data))
+        for field, direction in reversed(self._orders):
+            rows.sort(key=lambda item: item[0] if field == '__name__' else item[1][field],
+                      reverse=direction == 'DESCENDING')
+        if not self._orders:
+            rows.sort(key=lambda item: item[0])
+        if self._cursor is not None:
+            ids = [doc_id for doc_id, _ in rows]
+            position = ids.index(self._cursor.id) if self._cursor.id in ids else -1
+            rows = rows[position + 1:]
+        return rows
+
+    def stream(self):
+        rows = self._matches()
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        self._collection.db.queries += 1
+        for doc_id, data in rows:
+            self._collection.db.reads += 1
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeSnapshot(self._collection, doc_id, data, self._collection.update_times.get(doc_id))
+
+    def get(self):
+        return list(self.stream())
+
+class FakeDocumentRef:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        self._collection.db.reads += 1
+        return FakeSnapshot(self._collection, self.id, self._collection.docs.get(self.id),
+                            self._collection.update_times.get(self.id))
+
+    def set(self, data):
+        self._collection.docs[self.id] = dict(data)
+        self._collection.update_times[self.id] = datetime.now(timezone.utc)
+
+    def update(self, data):
+        self._collection.docs[self.id].update(data)
+        self._collection.update_times[self.id] = datetime.now(timezone.utc)
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = {}
+        self.update_times = {}
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return FakeDocumentRef(self, doc_id or f"auto{next(self.db._ids)}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return ref
+
+class FakeBatch:
+    def __init__(self):
+        self._writes = []
+
+    def set(self, ref, data):
+        self._writes.append((ref, data))
+
+    def commit(self):
+        for ref, data in self._writes:
+            ref.set(data)
+        self._writes = []
+
+class FakeFirestore:
+    def __init__(self):
+        self._collections = {}
+        self._ids = itertools.count()
+        self.reads = 0
+        self.queries = 0
+        self.aggregations = 0
+
+    def collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def get_all(self, refs, field_paths=None):
+        for ref in refs:
+            yield ref.get()
+
+    def batch(self):
+        return FakeBatch()
+
+    def reset_counters(self):
+        self.reads = self.queries = self.aggregations = 0
@@ -0,0 +1,34 @@
+"""Helpers for running server.py against the in-memory Firestore fake."""
+import logging
+import os
+import sys
+import time
+from unittest.mock import patch
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.fake_firestore import FakeFirestore  # noqa: E402
+
+def load_server(db=None):
+    """Import server.py with Firebase patched to use ``db`` (a FakeFirestore)"""
+    db = db or FakeFirestore()
+    # Seeded data differs per run; keep results off the on-disk caches
+    os.environ.setdefault('ROLLUP_CACHE_PATH', '')
+    os.environ.setdefault('CACHE_BACKEND', 'memory')
+    with patch('firebase_admin.initialize_app'), patch('firebase_admin.credentials.Certificate'), \
+            patch('firebase_admin.firestore.client', return_value=db):
+        import server
+    server.db = db
+    logging.disable(logging.CRITICAL)
+    return server, db
+
+def timed(fn, *args, repeat=3, **kwargs):
+    """Return (best wall time in seconds, last result) over ``repeat`` runs"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, result
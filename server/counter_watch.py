@@ -0,0 +1,128 @@
+"""Version stamps for cached stats, taken from the ``counters`` collection.
+
+The frontend increments ``counters/<collection>`` on every write, so a
+counter's ``count`` changes exactly when its collection does. A cache key that
+embeds the counts of the collections it reads (see :func:`counter_stamp`)
+changes with the next write, and the entry cached under the old key is never
+served again. A watcher keeps the latest documents in memory so requests need
+not read them: a Firestore snapshot listener, or polling where listeners are
+unavailable::
+
+    versions = CounterVersions()
+    watcher = start_counter_watcher(db, versions, mode='snapshot')
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def counter_value(doc):
+    count = (doc or {}).get('count')
+    return count if isinstance(count, (int, float)) and not isinstance(count, bool) else None
+
+def counter_stamp(docs, collections):
+    """Counts of ``collections`` in the counters ``docs`` as a string ('' if none has a counter).
+
+    ``'counters'`` itself stands for every counters document.
+    """
+    names = sorted(docs) if 'counters' in collections else sorted(set(collections) & set(docs))
+    return ','.join(str(counter_value(docs[name])) for name in names)
+
+def counters_cover(docs, collections):
+    """True if a write to any of ``collections`` changes its counter_stamp"""
+    return all(name == 'counters' or name in docs for name in collections)
+
+class CounterVersions:
+    """Latest ``counters`` documents, kept current by a watcher"""
+
+    def __init__(self):
+        self._docs = {}
+        self._lock = threading.Lock()
+        self.live = False
+
+    def update(self, docs):
+        """Replace the known documents with ``docs``; return the ids whose count changed"""
+        with self._lock:
+            changed = {doc_id for doc_id in set(docs) | set(self._docs)
+                       if counter_value(docs.get(doc_id)) != counter_value(self._docs.get(doc_id))}
+            self._docs = dict(docs)
+            self.live = True
+        return changed
+
+    def documents(self):
+        with self._lock:
+            return dict(self._docs)
+
+class SnapshotCounterWatcher:
+    """Keep ``versions`` current with a Firestore snapshot listener on ``counters``"""
+
+    def __init__(self, db, versions):
+        self.db = db
+        self.versions = versions
+        self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        changed = self.versions.update({doc.id: doc.to_dict() for doc in docs if doc.exists})
+        if changed:
+            logger.info(f"Counters changed: {', '.join(sorted(changed))}")
+
+    def start(self):
+        self._watch = self.db.collection('counters').on_snapshot(self._on_snapshot)
+        return self
+
+    def active(self):
+        return self._watch is not None and getattr(self._watch, 'is_active', True)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self.versions.live = False
+
+class PollingCounterWatcher:
+    """Keep ``versions`` current by reading ``counters`` every ``interval`` seconds"""
+
+    def __init__(self, db, versions, interval=15):
+        self.db = db
+        self.versions = versions
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """Read the counters once; return the ids whose count changed"""
+        try:
+            docs = {doc.id: doc.to_dict() for doc in self.db.collection('counters').get() if doc.exists}
+        except Exception as e:
+            logger.warning(f"Polling counters failed: {str(e)}")
+            self.versions.live = False
+            return set()
+        return self.versions.update(docs)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        self.poll()
+        self._thread = threading.Thread(target=self._run, name='counter-poll', daemon=True)
+        self._thread.start()
+        return self
+
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        self.versions.live = False
+
+def start_counter_watcher(db, versions, mode='snapshot', interval=15):
+    """Start watching ``counters``: mode 'snapshot' falls back to 'poll' if listeners fail"""
+    if mode == 'snapshot':
+        try:
+            return SnapshotCounterWatcher(db, versions).start()
+        except Exception as e:
+            logger.warning(f"Counters snapshot listener unavailable, polling instead: {str(e)}")
+    elif mode != 'poll':
+        raise ValueError(f"Unknown counter watch mode '{mode}'")
+    return PollingCounterWatcher(db, versions, interval).start()
@@ -0,0 +1,350 @@
+"""Daily rollup documents for the analytics event collections.
+
+Each rollup document holds the aggregate counts of one source collection for
+one calendar day in the dashboard timezone, so trend and breakdown charts can
+be built from one document per day instead of one per event. Documents live in
+the ``analytics_rollups`` collection under deterministic ids
+(``<collection>_<YYYY-MM-DD>``) and are fetched with a single batched
+``get_all`` call.
+
+Days that ended before today are immutable once written (``closed``); the
+current day is rebuilt from raw events on every read. Closed rollups are also
+kept in a local SQLite file (:class:`LocalRollupCache`) that is consulted
+before Firestore, so a warm range costs no rollup reads at all.
+"""
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from shared_cache import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = 'analytics_rollups'
+WRITE_BATCH_SIZE = 400
+
+MEDICAL_BOT_CATEGORIES = {
+    'susceptibility', 'symptoms', 'exams and tests', 'treatment',
+    'prevention', 'information', 'frequency', 'complications',
+    'causes', 'research', 'outlook', 'considerations', 'inheritance',
+    'stages', 'genetic changes', 'support groups'
+}
+
+def condition_bucket(condition):
+    """Map a free-text mental health condition onto a dashboard bucket"""
+    condition = str(condition or '').lower().strip()
+    if 'suicidal' in condition or 'suicide' in condition:
+        return "Suicidal"
+    if 'depress' in condition:
+        return "Depressed"
+    if 'anxiety' in condition:
+        return "Anxiety"
+    if 'normal' in condition:
+        return "Normal"
+    return "Other"
+
+def _medical_bot_category(data):
+    category = data.get('categroryQuestion', 'no Category')
+    return category if category in MEDICAL_BOT_CATEGORIES else None
+
+def _gender(data):
+    return str(data.get('gender') or 'Unknown').capitalize()
+
+# Source collection -> date field and the dimensions counted per day. A
+# dimension function returning None leaves the event out of that breakdown.
+ROLLUP_SPECS = {
+    'Disease Predictor': {
+        'date_field': 'date',
+        'dimensions': {
+            'disease': lambda data: data.get('disease', 'Unknown'),
+            'riskLevel': lambda data: data.get('riskLevel', 'High'),
+            'doctor': lambda data: data.get('doctor', 'Not Prescribed'),
+            'cures': lambda data: data.get('cures', 'Not Prescribed'),
+            'gender': _gender,
+        },
+    },
+    'Mental Health Analyzer': {
+        'date_field': 'date',
+        'dimensions': {
+            'condition': lambda data: condition_bucket(data.get('condition')),
+            'gender': _gender,
+        },
+    },
+    'Medical Assistance Bot': {
+        'date_field': 'date',
+        'dimensions': {
+            'category': _medical_bot_category,
+            'gender': _gender,
+        },
+    },
+    'users': {
+        'date_field': 'createdAt',
+        'dimensions': {
+            'gender': _gender,
+        },
+    },
+}
+
+def rollup_id(collection, day):
+    return f"{collection}_{day.isoformat()}"
+
+def day_bounds(day, tz):
+    """Return the [start, end) datetimes of ``day`` in ``tz``"""
+    start = tz.localize(datetime(day.year, day.month, day.day))
+    end = tz.localize(datetime(day.year, day.month, day.day) + timedelta(days=1))
+    return start, end
+
+def to_day(value, tz):
+    """Convert a Firestore timestamp or ISO string to a date in ``tz``"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        return value.astimezone(tz).date()
+    return None
+
+def empty_rollup(collection, day):
+    spec = ROLLUP_SPECS[collection]
+    rollup = {'collection': collection, 'day': day.isoformat(), 'count': 0}
+    rollup.update({name: {} for name in spec['dimensions']})
+    return rollup
+
+def add_to_rollup(rollup, collection, data):
+    """Count one event document into ``rollup`` in place"""
+    rollup['count'] += 1
+    for name, key_fn in ROLLUP_SPECS[collection]['dimensions'].items():
+        key = key_fn(data)
+        if key is None:
+            continue
+        key = str(key)
+        rollup[name][key] = rollup[name].get(key, 0) + 1
+
+def stream_documents(query):
+    """Default ``iter_docs``: every document of ``query`` from one stream"""
+    return query.stream()
+
+def build_rollup(db, collection, day, start, end, iter_docs=stream_documents):
+    """Build the rollup of ``day`` from raw events dated in ``[start, end)``"""
+    date_field = ROLLUP_SPECS[collection]['date_field']
+    rollup = empty_rollup(collection, day)
+    query = db.collection(collection).where(date_field, '>=', start).where(date_field, '<', end)
+    for doc in iter_docs(query.order_by(date_field)):
+        add_to_rollup(rollup, collection, doc.to_dict())
+    return rollup
+
+def bucket_rollups(collection, docs, tz, last_day=None):
+    """Count event ``docs`` into one rollup per day in a single pass.
+
+    Events without a parseable date, or dated after ``last_day`` (when
+    given), are skipped. Returns ``{day: rollup}`` for the days with events.
+    """
+    date_field = ROLLUP_SPECS[collection]['date_field']
+    rollups = {}
+    for doc in docs:
+        data = doc.to_dict()
+        try:
+            day = to_day(data.get(date_field), tz)
+        except ValueError:
+            day = None
+        if day is None or (last_day is not None and day > last_day):
+            continue
+        if day not in rollups:
+            rollups[day] = empty_rollup(collection, day)
+        add_to_rollup(rollups[day], collection, data)
+    return rollups
+
+def fill_empty_days(rollups, collection, first_day, last_day):
+    """Add an empty rollup for each day of ``[first_day, last_day]`` without one"""
+    day = first_day
+    while day <= last_day:
+        if day not in rollups:
+            rollups[day] = empty_rollup(collection, day)
+        day += timedelta(days=1)
+    return rollups
+
+def build_day_rollups(db, collection, first_day, last_day, tz, iter_docs=stream_documents):
+    """Rebuild the rollups of the whole days ``[first_day, last_day]`` with one range scan"""
+    date_field = ROLLUP_SPECS[collection]['date_field']
+    start, end = day_bounds(first_day, tz)[0], day_bounds(last_day, tz)[1]
+    query = db.collection(collection).where(date_field, '>=', start).where(date_field, '<', end)
+    docs = iter_docs(query.order_by(date_field))
+    return fill_empty_days(bucket_rollups(collection, docs, tz), collection, first_day, last_day)
+
+def consecutive_runs(days):
+    """Split sorted ``days`` into lists of consecutive days"""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+def _write_rollups(db, rollups):
+    batch, pending = db.batch(), 0
+    for rollup in rollups:
+        day = datetime.strptime(rollup['day'], '%Y-%m-%d').date()
+        batch.set(db.collection(ROLLUP_COLLECTION).document(rollup_id(rollup['collection'], day)), rollup)
+        pending += 1
+        if pending >= WRITE_BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+
+class LocalRollupCache:
+    """Closed-day rollups in a local SQLite file, keyed by (collection, day); closed days never change"""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = SQLiteConnections(path)
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rollups ("
+                         "collection TEXT NOT NULL, day TEXT NOT NULL, data TEXT NOT NULL, "
+                         "PRIMARY KEY (collection, day))")
+
+    def get_many(self, collection, days):
+        """Return ``{day: rollup}`` for the cached days among ``days``"""
+        found = {}
+        keys = [day.isoformat() for day in days]
+        conn = self._connection()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = conn.execute(
+                f"SELECT day, data FROM rollups WHERE collection = ? AND day IN ({','.join('?' * len(chunk))})",
+                [collection, *chunk])
+            for day, data in rows:
+                found[datetime.strptime(day, '%Y-%m-%d').date()] = json.loads(data)
+        return found
+
+    def put_many(self, rollups):
+        """Store the closed rollups among ``rollups``"""
+        rows = [(rollup['collection'], rollup['day'], json.dumps(rollup))
+                for rollup in rollups if rollup.get('closed')]
+        if rows:
+            with self._connection() as conn:
+                conn.executemany("INSERT OR REPLACE INTO rollups (collection, day, data) VALUES (?, ?, ?)", rows)
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM rollups")
+
+def load_rollups(db, collection, first_day, last_day, tz, local=None, iter_docs=stream_documents):
+    """Return ``{day: rollup}`` for every day in ``[first_day, last_day]``.
+
+    Closed days come from ``local`` (a :class:`LocalRollupCache`) when given,
+    then from their rollup documents; days whose rollup is missing or was
+    written while still open are rebuilt from raw events and persisted, one
+    range scan per run of consecutive days, read through ``iter_docs(query)``.
+    Today is always rebuilt and stored as open.
+    """
+    today = datetime.now(tz).date()
+    last_day = min(last_day, today)
+    days = []
+    day = first_day
+    while day <= last_day:
+        days.append(day)
+        day += timedelta(days=1)
+    if not days:
+        return {}
+
+    rollups = local.get_many(collection, [day for day in days if day < today]) if local is not None else {}
+    missing = [day for day in days if day not in rollups]
+    if not missing:
+        return rollups
+
+    refs = [db.collection(ROLLUP_COLLECTION).document(rollup_id(collection, day)) for day in missing]
+    stored = {}
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            data = snapshot.to_dict()
+            stored[data['day']] = data
+
+    stale = [day for day in missing if day >= today or not stored.get(day.isoformat(), {}).get('closed')]
+    rebuilt = {}
+    for run in consecutive_runs(stale):
+        rebuilt.update(build_day_rollups(db, collection, run[0], run[-1], tz, iter_docs))
+    for day, rollup in rebuilt.items():
+        rollup['closed'] = day < today
+
+    fetched = [rebuilt[day] if day in rebuilt else stored[day.isoformat()] for day in missing]
+    rollups.update(zip(missing, fetched))
+    if rebuilt:
+        _write_rollups(db, rebuilt.values())
+        logger.info(f"Rebuilt {len(rebuilt)} '{collection}' rollups")
+    if local is not None:
+        local.put_many(fetched)
+    return rollups
+
+def rollups_for_range(db, collection, start, end, tz, local=None, iter_docs=stream_documents):
+    """Return ``{day: rollup}`` covering exactly the events in ``[start, end]``.
+
+    Whole days come from :func:`load_rollups`. When ``start`` or ``end`` falls
+    inside a day, that partial day is counted from raw events instead so the
+    result matches a direct range query.
+    """
+    first_day, last_day = start.astimezone(tz).date(), end.astimezone(tz).date()
+    if first_day > last_day:
+        return {}
+    end = end + timedelta(microseconds=1)
+    first_start, first_end = day_bounds(first_day, tz)
+    last_start, last_end = day_bounds(last_day, tz)
+    if first_day == last_day and (start > first_start or end < last_end):
+        return {first_day: build_rollup(db, collection, first_day, max(start, first_start), min(end, last_end),
+                                        iter_docs)}
+
+    rollups = {}
+    whole_first, whole_last = first_day, last_day
+    if start > first_start:
+        rollups[first_day] = build_rollup(db, collection, first_day, start, first_end, iter_docs)
+        whole_first += timedelta(days=1)
+    if end < last_end:
+        rollups[last_day] = build_rollup(db, collection, last_day, last_start, end, iter_docs)
+        whole_last -= timedelta(days=1)
+    rollups.update(load_rollups(db, collection, whole_first, whole_last, tz, local, iter_docs))
+    return rollups
+
+def merge_rollups(rollups):
+    """Sum a set of day rollups into ``trends`` plus one Counter per dimension"""
+    merged = {'trends': {}}
+    dimensions = defaultdict(Counter)
+    for day, rollup in sorted(rollups.items()):
+        if rollup.get('count'):
+            merged['trends'][day.isoformat()] = rollup['count']
+        for name in ROLLUP_SPECS[rollup['collection']]['dimensions']:
+            dimensions[name].update(rollup.get(name, {}))
+    merged.update(dimensions)
+    return merged
+
+def backfill_rollups(db, tz, collections=None, since=None, until=None, iter_docs=stream_documents):
+    """Build closed-day rollups from existing history in one pass per collection.
+
+    Each source collection is read once in date order through
+    ``iter_docs(query)`` and bucketed per day, so the backfill costs one read
+    per event rather than one query per day. ``since`` and ``until`` are
+    widened to whole days, so no partial day is marked closed. Returns
+    ``{collection: days_written}``.
+    """
+    today = datetime.now(tz).date()
+    yesterday = today - timedelta(days=1)
+    first_day = since.astimezone(tz).date() if since else None
+    last_day = min(until.astimezone(tz).date(), yesterday) if until else yesterday
+    written = {}
+    for collection in collections or ROLLUP_SPECS:
+        date_field = ROLLUP_SPECS[collection]['date_field']
+        query = db.collection(collection)
+        if first_day:
+            query = query.where(date_field, '>=', day_bounds(first_day, tz)[0])
+        if until:
+            query = query.where(date_field, '<', day_bounds(last_day, tz)[1])
+        rollups = bucket_rollups(collection, iter_docs(query.order_by(date_field)), tz, last_day=yesterday)
+        # Days without events still get an (empty) closed rollup so later
+        # reads never fall back to raw queries for them.
+        if rollups:
+            fill_empty_days(rollups, collection, first_day or min(rollups), last_day)
+        for rollup in rollups.values():
+            rollup['closed'] = True
+        _write_rollups(db, rollups.values())
+        written[collection] = len(rollups)
+        logger.info(f"Backfilled {len(rollups)} daily rollups for '{collection}'")
+    return written
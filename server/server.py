@@ -2,13 +2,20 @@
 # Standard Library
 import sys
 import signal
+import base64
+import hashlib
+import json
 import re
 import string
 import atexit
 import logging
 import os
+import threading
 from datetime import datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+import time
 from dotenv import load_dotenv
 
 # Anchor filesystem paths to this file's directory so the server can be
@@ -22,24 +29,36 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 import numpy as np
 import pytz
 import pickle
+import click
+from cachetools import LRUCache, TTLCache
 from sentence_transformers import util
 # pyrefly: ignore [missing-import]
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS, cross_origin
-from flask_caching import Cache
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Firebase Admin SDK
 # pyrefly: ignore [missing-import]
 import firebase_admin
 from firebase_admin import auth, credentials, initialize_app, firestore
 
+# Local modules
+from aggregation import AggregationEngine, CountByDay, CountByField, DayBucketer, DistinctCount, TopK
+from rollups import (ROLLUP_SPECS, MEDICAL_BOT_CATEGORIES, LocalRollupCache, backfill_rollups,
+                     condition_bucket, day_bounds, merge_rollups, rollups_for_range)
+from counter_watch import CounterVersions, counter_stamp, counters_cover, start_counter_watcher
+from shared_cache import make_store
+from stats_cache import StatsCache
+
 # Initialize Flask app
 app = Flask(__name__)
 
 # Configure CORS with environment variables
 frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 CORS(app, resources={r"/*": {"origins": [frontend_url]}})
-cache = Cache(app, config={'CACHE_TYPE': 'simple'})
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -70,6 +89,76 @@ except Exception as e:
 # Global state
 server_running = True
 
+# Thread pool used to fan out the independent /admin/stats sections. Every
+# section is I/O-bound on Firestore, so threads overlap the round trips.
+STATS_MAX_WORKERS = int(os.getenv('STATS_MAX_WORKERS', 8))
+STATS_SECTION_TIMEOUT = float(os.getenv('STATS_SECTION_TIMEOUT', 60))
+stats_executor = ThreadPoolExecutor(max_workers=STATS_MAX_WORKERS, thread_name_prefix='stats')
+
+# Page size for analytics scans. The next page is fetched on its own pool
+# (never stats_executor, whose workers are the ones waiting on it).
+ANALYTICS_PAGE_SIZE = int(os.getenv('ANALYTICS_PAGE_SIZE', 500))
+prefetch_executor = ThreadPoolExecutor(max_workers=STATS_MAX_WORKERS, thread_name_prefix='prefetch')
+
+# Trend and breakdown charts are served from daily rollup documents (see
+# rollups.py) unless disabled. History before ANALYTICS_EPOCH is ignored.
+ROLLUPS_ENABLED = os.getenv('ANALYTICS_ROLLUPS', 'true').lower() == 'true'
+ANALYTICS_EPOCH = datetime.fromisoformat(os.getenv('ANALYTICS_EPOCH', '2025-04-17T00:00:00+00:00'))
+# Closed-day rollups are also kept on local disk; an empty path disables it.
+ROLLUP_CACHE_PATH = os.getenv('ROLLUP_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'rollups.sqlite3'))
+rollup_cache = LocalRollupCache(ROLLUP_CACHE_PATH) if ROLLUP_CACHE_PATH else None
+
+# Registration name index used by the gender filters: refreshed with new
+# registrations after GENDER_INDEX_TTL seconds, rebuilt from scratch after
+# GENDER_INDEX_MAX_AGE seconds to pick up edits and deletions.
+GENDER_INDEX_TTL = int(os.getenv('GENDER_INDEX_TTL', 300))
+GENDER_INDEX_MAX_AGE = int(os.getenv('GENDER_INDEX_MAX_AGE', 86400))
+
+# Recent activity reads at most RECENT_ACTIVITY_LIMIT logins, a page at a time,
+# and resolves user emails through a small per-process LRU.
+RECENT_ACTIVITY_LIMIT = int(os.getenv('RECENT_ACTIVITY_LIMIT', 1000))
+RECENT_ACTIVITY_PAGE_SIZE = 200
+USER_LOOKUP_BATCH_SIZE = 100
+
+# Trailing windows (in days) reported as active users: today, week, month.
+ACTIVE_USER_WINDOWS = (1, 7, 30)
+user_email_cache = TTLCache(maxsize=int(os.getenv('USER_EMAIL_CACHE_SIZE', 5000)), ttl=3600)
+user_email_lock = threading.Lock()
+
+# Result caches live in a store shared by all workers on the host ('sqlite')
+# or in each process ('memory'), one namespace per cache.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'shared.sqlite3'))
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 2000))
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv('INFERENCE_CACHE_MAX_ENTRIES', 5000))
+stats_store = make_store(CACHE_BACKEND, SHARED_CACHE_PATH, SHARED_CACHE_MAX_ENTRIES, namespace='stats')
+inference_store = make_store(CACHE_BACKEND, SHARED_CACHE_PATH, INFERENCE_CACHE_MAX_ENTRIES, namespace='inference')
+
+# /admin/stats sections are fresh for their own TTL (STATS_CACHE_TTL for the
+# analytics, STATS_RECENT_TTL for counters and recent activity), then served
+# stale for up to STATS_CACHE_STALE_TTL more while one refresh runs.
+STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 300))
+STATS_RECENT_TTL = int(os.getenv('STATS_RECENT_TTL', 60))
+STATS_CACHE_STALE_TTL = int(os.getenv('STATS_CACHE_STALE_TTL', 3600))
+stats_cache = StatsCache(ttl=STATS_CACHE_TTL, stale_ttl=STATS_CACHE_STALE_TTL, store=stats_store)
+
+# Cached sections embed the counts of the collections they read (from the
+# counters documents, taken once per request) in their keys, so a new write is
+# never hidden behind a TTL and sections covered by counters can stay fresh for
+# STATS_VERSIONED_TTL. A watcher saves each request the counters read;
+# COUNTER_WATCH: 'snapshot' (listener, falls back to polling), 'poll' or 'off'.
+COUNTER_WATCH = os.getenv('COUNTER_WATCH', 'snapshot')
+COUNTER_POLL_INTERVAL = float(os.getenv('COUNTER_POLL_INTERVAL', 15))
+STATS_VERSIONED_TTL = int(os.getenv('STATS_VERSIONED_TTL', 3600))
+counter_versions = CounterVersions()
+counter_watcher = None
+counter_watcher_lock = threading.Lock()
+
+# Medical assistant answers per normalised query and loaded model.
+INFERENCE_CACHE_TTL = int(os.getenv('INFERENCE_CACHE_TTL', 86400))
+# Filtered sections for windows that ended before today rarely change.
+STATS_CACHE_HISTORICAL_TTL = int(os.getenv('STATS_CACHE_HISTORICAL_TTL', 3600))
+
 # --- Helper Functions ---
 def clean_text(text):
     """Sanitize and normalize text input"""
@@ -85,6 +174,91 @@ def clean_text(text):
     text = re.sub(r'\w*\d\w*', ' ', text)
     return text.strip()
 
+def iter_sections(sections, depends=None, timeout=None, executor=None):
+    """Run section builders concurrently, yielding ``(name, value, error)`` as each finishes"""
+    depends = depends or {}
+    check_dependencies(sections, depends)
+    return _iter_sections(sections, depends, STATS_SECTION_TIMEOUT if timeout is None else timeout,
+                          executor or stats_executor)
+
+def check_dependencies(sections, depends):
+    """Raise ValueError unless every section's dependencies exist and none are circular"""
+    for name in sections:
+        unknown = [dep for dep in depends.get(name, ()) if dep not in sections]
+        if unknown:
+            raise ValueError(f"Section '{name}' depends on unknown sections: {', '.join(unknown)}")
+    ordered, pending = set(), set(sections)
+    while pending:
+        ready = {name for name in pending if all(dep in ordered for dep in depends.get(name, ()))}
+        if not ready:
+            raise ValueError(f"Circular section dependencies among: {', '.join(sorted(pending))}")
+        ordered |= ready
+        pending -= ready
+
+def _iter_sections(sections, depends, timeout, executor):
+    pending, values, running, started = list(sections), {}, {}, {}
+
+    def run(name, inputs):
+        started[name] = time.monotonic()
+        return sections[name](inputs)
+
+    while pending or running:
+        for name in [name for name in pending if all(dep in values for dep in depends.get(name, ()))]:
+            pending.remove(name)
+            inputs = {dep: values[dep] for dep in depends.get(name, ())}
+            running[executor.submit(run, name, inputs)] = name
+        # A section's clock starts when a worker picks it up; queued ones are looked at again within ``timeout``
+        now = time.monotonic()
+        next_deadline = min(started[name] + timeout if name in started else now + timeout for name in running.values())
+        done, _ = wait(running, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                values[name] = future.result()
+                yield name, values[name], None
+            except Exception as e:
+                logger.error(f"Stats section '{name}' failed: {str(e)}", exc_info=True)
+                values[name] = None
+                yield name, None, str(e)
+        now = time.monotonic()
+        for future, name in list(running.items()):
+            if name not in started or started[name] + timeout > now:
+                continue
+            # A running section cannot be stopped: it keeps its executor worker
+            # until it returns, so abandoned sections are bounded by the pool size.
+            del running[future]
+            logger.error(f"Stats section '{name}' timed out after {timeout}s")
+            values[name] = None
+            yield name, None, f"Timed out after {timeout}s"
+
+def iter_documents(query, page_size=None, fields=None, limit=None, prefetch=True):
+    """Yield every document matched by the ordered ``query``, one page at a time, prefetching the next page"""
+    page_size = page_size or ANALYTICS_PAGE_SIZE
+    if fields is not None:
+        query = query.select(list(fields))
+
+    def fetch(last_doc, size):
+        page = query.limit(size)
+        if last_doc is not None:
+            page = page.start_after(last_doc)
+        return list(page.stream())
+
+    remaining = limit
+    docs = fetch(None, page_size if limit is None else min(page_size, limit))
+    while docs:
+        if remaining is not None:
+            remaining -= len(docs)
+        size = page_size if remaining is None else min(page_size, remaining)
+        # A short page is the last one; no need to ask for another
+        next_page = None
+        if len(docs) == page_size and size > 0:
+            next_page = prefetch_executor.submit(fetch, docs[-1], size) if prefetch else None
+            last_doc = docs[-1]
+        yield from docs
+        if len(docs) < page_size or size <= 0:
+            break
+        docs = next_page.result() if next_page is not None else fetch(last_doc, size)
+
 def format_timestamp(timestamp):
     """Standardize timestamp formatting"""
     if not timestamp:
@@ -118,6 +292,13 @@ try:
 
     # Load medical assistance model
     with open(os.path.join(BASE_DIR, 'medical_assistance_material/model_embeddings.pkl'), 'rb') as f:
+        # Cached answers are keyed by this, so a new model never serves old answers.
+        # Hashed in chunks so the file's bytes are not kept next to the model.
+        digest = hashlib.sha1()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+        medical_model_fingerprint = digest.hexdigest()[:16]
+        f.seek(0)
         data = pickle.load(f)
         model = data['model']
         question_embeddings = data['embeddings']
@@ -208,6 +389,10 @@ def predict_mental_health():
 def get_answer(user_query, top_n=3):
     """Get answer from medical assistance model"""
     user_query = user_query.lower().strip()
+    key = f"answer:{medical_model_fingerprint}:{top_n}:{hashlib.sha1(user_query.encode()).hexdigest()}"
+    cached = inference_store.get(key)
+    if cached is not None:
+        return cached
     query_embedding = model.encode(user_query, convert_to_tensor=True)
 
     scores = util.pytorch_cos_sim(query_embedding, question_embeddings)[0]
@@ -222,6 +407,7 @@ def get_answer(user_query, top_n=3):
             'Category': qtype[idx]
         })
 
+    inference_store.set(key, results, INFERENCE_CACHE_TTL)
     return results
 
 @app.route('/medical_assistance', methods=['POST'])
@@ -245,422 +431,446 @@ def get_answer_route():
         return jsonify({'error': 'Internal server error'}), 500
 
 # --- Analytics Functions ---
-def get_enhanced_disease_analytics(start_date, end_date=None, gender='All', operation='GET'):
+class GenderIndex:
+    """Registered user names per gender, loaded once and topped up from new registrations every ``ttl`` seconds"""
+
+    FIELDS = ['name', 'gender', 'registeredAt']
+
+    def __init__(self, ttl=GENDER_INDEX_TTL, max_age=GENDER_INDEX_MAX_AGE):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._names = defaultdict(set)
+        self._last_registered = None
+        self._built_at = None
+        self._refreshed_at = None
+
+    def _scan(self, query):
+        """Return the names per gender and the latest ``registeredAt`` of ``query``"""
+        names, last_registered = defaultdict(set), None
+        for doc in iter_documents(query, fields=self.FIELDS):
+            data = doc.to_dict()
+            names[data.get('gender')].add(data.get('name'))
+            registered = data.get('registeredAt')
+            if isinstance(registered, datetime) and (last_registered is None or registered > last_registered):
+                last_registered = registered
+        return names, last_registered
+
+    def _rebuild(self):
+        names, last_registered = self._scan(db.collection('registrations').order_by('__name__'))
+        with self._lock:
+            self._names, self._last_registered = names, last_registered
+            self._built_at = self._refreshed_at = time.monotonic()
+        logger.info(f"Built gender index from {sum(len(names) for names in names.values())} registrations")
+
+    def _refresh(self):
+        query = db.collection('registrations')
+        if self._last_registered is not None:
+            query = query.where('registeredAt', '>', self._last_registered)
+        names, last_registered = self._scan(query.order_by('registeredAt'))
+        with self._lock:
+            for gender, added in names.items():
+                self._names[gender] |= added
+            if last_registered is not None:
+                self._last_registered = last_registered
+            self._refreshed_at = time.monotonic()
+
+    def _due(self):
+        """Return the update the index needs now: _rebuild, _refresh or None"""
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at > self.max_age:
+            return self._rebuild
+        if now - self._refreshed_at > self.ttl:
+            return self._refresh
+        return None
+
+    def names(self, gender):
+        """Return the names registered with ``gender`` (matched in lower case)"""
+        # Wait for a scan in progress only when there is no index to read yet
+        if self._due() and self._scan_lock.acquire(blocking=self._built_at is None):
+            try:
+                update = self._due()
+                if update:
+                    update()
+            finally:
+                self._scan_lock.release()
+        with self._lock:
+            return frozenset(self._names.get(gender.lower(), ()))
+
+gender_index = GenderIndex()
+
+def get_rollup_analytics(collection, start_date=None, end_date=None):
+    """Merge the daily rollups of a collection covering [start_date, end_date]"""
+    start_date = start_date or ANALYTICS_EPOCH
+    end_date = end_date or datetime.now(tz)
+    return merge_rollups(rollups_for_range(db, collection, start_date, end_date, tz, rollup_cache, iter_documents))
+
+def medical_bot_day_range(start_date, end_date):
+    """Return the (start, end) datetimes of the whole days kept by the chatbot filter"""
+    start = end = None
+    if start_date:
+        first_day = start_date.astimezone(tz).date()
+        if datetime.combine(first_day, datetime.min.time()).replace(tzinfo=tz) < start_date:
+            first_day += timedelta(days=1)
+        start = day_bounds(first_day, tz)[0]
+    if end_date:
+        last_day = end_date.astimezone(tz).date()
+        if datetime.combine(last_day, datetime.min.time()).replace(tzinfo=tz) > end_date:
+            last_day -= timedelta(days=1)
+        end = day_bounds(last_day, tz)[1] - timedelta(microseconds=1)
+    return start, end
+
+DISEASE_COLUMNS = ['date', 'cures', 'doctor', 'disease', 'userName', 'riskLevel', 'inputDescription', 'serialNo']
+MENTAL_HEALTH_COLUMNS = ['userName', 'date', 'userMessage', 'botResponse', 'serialNo']
+MEDICAL_BOT_COLUMNS = ['userName', 'date', 'userMessage', 'botResponse', 'serialNo', 'categroryQuestion']
+FEEDBACK_COLUMNS = ['name', 'date', 'message', 'email']
+# Fields the analytics builders aggregate, fetched instead of the table columns
+DISEASE_ANALYTICS_FIELDS = ['userName', 'date', 'disease', 'riskLevel', 'doctor', 'cures']
+MENTAL_HEALTH_ANALYTICS_FIELDS = ['userName', 'date', 'condition']
+MEDICAL_BOT_ANALYTICS_FIELDS = ['userName', 'date', 'categroryQuestion']
+
+_day_bucketer = None
+
+def day_bucketer():
+    """Return a DayBucketer covering ANALYTICS_EPOCH through today (rebuilt daily)"""
+    global _day_bucketer
+    today = datetime.now(tz).date()
+    bucketer = _day_bucketer
+    if bucketer is None or bucketer.last_day != today:
+        bucketer = DayBucketer(tz, ANALYTICS_EPOCH.astimezone(tz).date() - timedelta(days=1), today)
+        _day_bucketer = bucketer
+    return bucketer
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def event_rows(docs, user_names=None, date_field='date', bucketer=None):
+    """Yield the data of each dated event document with its day number under ``day``"""
+    bucketer = bucketer or day_bucketer()
+    for batch in _batches(docs, ANALYTICS_PAGE_SIZE):
+        rows = [doc.to_dict() for doc in batch]
+        if user_names is not None:
+            rows = [data for data in rows if data.get('userName') in user_names]
+        dates = [data.get(date_field) for data in rows]
+        epochs = np.array([date.timestamp() if isinstance(date, datetime) else np.nan for date in dates])
+        for data, date_obj, day in zip(rows, dates, bucketer.indexes(epochs).tolist()):
+            if day == DayBucketer.MISSING:
+                try:
+                    day = bucketer.index(date_obj)
+                except ValueError as e:
+                    logger.warning(f"Invalid date format {date_obj!r}: {str(e)}")
+                    continue
+                if day is None:
+                    continue
+            data['day'] = day
+            yield data
+
+def get_enhanced_disease_analytics(start_date, end_date=None, gender='All', operation='GET', user_names=None):
     """Get disease analytics data"""
-    trends = defaultdict(int)
-    categories = defaultdict(int)
-    risk_levels = defaultdict(int)
-    doctors = defaultdict(int)
-    medicine = defaultdict(int)
-    disease_data = defaultdict(dict)
-    last_doc_disease = None
-    user_lookup = defaultdict(dict)
-    last_doc_registrations = None
+    gender_filtered = gender != 'All' and operation == 'POST'
+    use_rollups = ROLLUPS_ENABLED and not gender_filtered
 
     if operation == 'POST':
         if end_date is None:
             end_date = datetime.now(pytz.UTC)
-        if gender != 'All':
-            while True:
-                queryy = db.collection('registrations').where('gender', '==', gender.lower()).limit(500)
-                if last_doc_registrations:
-                    queryy = queryy.start_after(last_doc_registrations)
-                docss = list(queryy.stream())
-                if not docss:
-                    break
-                user_lookup.update({docu.to_dict().get('name'): docu.to_dict() for docu in docss})
-                last_doc_registrations = docss[-1] if docss else None
-            logger.info(f"Loaded {len(user_lookup)} users from registrations for gender: {gender}")
-
-    while True:
-        query = db.collection('Disease Predictor').where('date', '>=', start_date).limit(20)
+        if gender_filtered and user_names is None:
+            user_names = gender_index.names(gender)
+
+    if use_rollups:
+        rollup = get_rollup_analytics('Disease Predictor', start_date, end_date)
+        results = {
+            'trends': rollup['trends'],
+            'categories': sorted(rollup.get('disease', {}).items(), key=lambda x: (-x[1], x[0]))[:10],
+            'risk_levels': rollup.get('riskLevel', {}),
+            'doctors': rollup.get('doctor', {}),
+            'cures': rollup.get('cures', {}),
+        }
+    else:
+        query = db.collection('Disease Predictor').where('date', '>=', start_date)
         if end_date:
             query = query.where('date', '<=', end_date)
-        if gender != 'All' and operation == 'POST':
+        if gender_filtered:
             query = query.where('gender', '==', gender.lower().capitalize())
-        query = query.order_by('date').limit(500)
-        if last_doc_disease:
-            query = query.start_after(last_doc_disease)
-        docs = list(query.stream())
-        if not docs:
-            break
-        for doc in docs:
-            data = doc.to_dict()
-            username = data.get('userName')
-            if gender != 'All' and operation == 'POST' and username not in user_lookup:
-                continue
-            date_obj = data.get('date')
-            if not date_obj:
-                continue
-            day = (date_obj.astimezone(tz).strftime('%Y-%m-%d') if isinstance(date_obj, datetime)
-                   else datetime.fromisoformat(date_obj.replace('Z', '+00:00')).astimezone(tz).strftime('%Y-%m-%d')
-                   if isinstance(date_obj, str) else None)
-            if not day:
-                continue
-            disease_data[doc.id] = data
-            trends[day] += 1
-            categories[data.get('disease', 'Unknown')] += 1
-            risk_levels[data.get('riskLevel', 'High')] += 1
-            doctors[data.get('doctor', 'Not Prescribed')] += 1
-            medicine[data.get('cures', 'Not Prescribed')] += 1
-        last_doc_disease = docs[-1] if docs else None
-
-    columns = ['date', 'cures', 'doctor', 'disease', 'userName', 'riskLevel', 'inputDescription', 'serialNo']
-    structured_data = [{column: data.get(column, None) for column in columns} for data in disease_data.values()]
-
+        docs = iter_documents(query.order_by('date'), fields=DISEASE_ANALYTICS_FIELDS)
+        results = AggregationEngine({
+            'trends': CountByDay(label=day_bucketer().label),
+            'categories': TopK('disease', 10, default='Unknown'),
+            'risk_levels': CountByField('riskLevel', default='High'),
+            'doctors': CountByField('doctor', default='Not Prescribed'),
+            'cures': CountByField('cures', default='Not Prescribed'),
+        }).feed(event_rows(docs, user_names if gender_filtered else None)).results()
+
+    # Rollup Counters and raw counts see names in different orders; list both by count, then name
+    by_count = lambda counts: sorted(counts.items(), key=lambda x: (-x[1], x[0]))
     return {
-        'structured_data': structured_data,
-        'trends': [{"date": day, "count": count} for day, count in sorted(trends.items(), key=lambda x: x[0])],
-        'categories': [{"name": name, "count": count} for name, count in sorted(categories.items(), key=lambda x: (-x[1], x[0]))[:10]],
-        'risk_levels': [{"name": name, "value": count} for name, count in risk_levels.items()],
-        'doctors': [{"name": name, "count": count} for name, count in doctors.items()],
-        'cures': [{"name": name, "count": count} for name, count in medicine.items()]
+        'trends': [{"date": day, "count": count} for day, count in results['trends'].items()],
+        'categories': [{"name": name, "count": count} for name, count in results['categories']],
+        'risk_levels': [{"name": name, "value": count} for name, count in by_count(results['risk_levels'])],
+        'doctors': [{"name": name, "count": count} for name, count in by_count(results['doctors'])],
+        'cures': [{"name": name, "count": count} for name, count in by_count(results['cures'])]
     }
 
-def get_mental_health_analytics(start_date, end_date=None, gender='All', operation='GET'):
+def get_mental_health_analytics(start_date, end_date=None, gender='All', operation='GET', user_names=None):
     if start_date is None:
         start_date = datetime.fromisoformat("2025-04-17T00:00:00+00:00")
     if end_date is None:
         end_date = datetime.now(pytz.UTC)
 
-    trends = defaultdict(int)
-    mental_data = {}
     distribution = {"Suicidal": 0, "Depressed": 0, "Anxiety": 0, "Normal": 0, "Other": 0}
-    user_lookup = {}
-    last_doc_mental = None  # Separate last_doc for Mental Health Analyzer
-    last_doc_registrations = None  # Separate last_doc for registrations
-
-    if gender != 'All' or operation == 'POST':
-        while True:
-            queryy = db.collection('registrations').where('gender', '==', gender.lower()).limit(500)
-            if last_doc_registrations:
-                queryy = queryy.start_after(last_doc_registrations)
-            docss = list(queryy.stream())
-            if not docss:
-                break
-            user_lookup.update({docu.to_dict().get('name'): docu.to_dict() for docu in docss})
-            last_doc_registrations = docss[-1] if docss else None
-        logger.info(f"Loaded {len(user_lookup)} users from registrations for gender: {gender}")
-
-    while True:
-        query = db.collection('Mental Health Analyzer').order_by('date', direction=firestore.Query.DESCENDING).limit(20)
+    use_rollups = ROLLUPS_ENABLED and gender == 'All'
+
+    if gender != 'All' and user_names is None:
+        user_names = gender_index.names(gender)
+
+    if use_rollups:
+        if operation == 'POST':
+            rollup = get_rollup_analytics('Mental Health Analyzer', start_date, end_date)
+        else:
+            rollup = get_rollup_analytics('Mental Health Analyzer')
+        results = {'trends': rollup['trends'], 'distribution': rollup.get('condition', {})}
+    else:
+        query = db.collection('Mental Health Analyzer').order_by('date', direction=firestore.Query.DESCENDING)
         if operation == 'POST':
             query = query.where('date', '>=', start_date).where('date', '<=', end_date)
-        query = query.limit(500)
-        if last_doc_mental:
-            query = query.start_after(last_doc_mental)
-        docs = list(query.stream())
-        if not docs:
-            break
-        for doc in docs:
-            data = doc.to_dict()
-            username = data.get('userName')
-            if gender != 'All' and username not in user_lookup:
-                continue
-            date_obj = data.get('date')
-            if not date_obj:
-                continue
-            try:
-                day = (date_obj.astimezone(tz).strftime('%Y-%m-%d') if isinstance(date_obj, datetime)
-                       else datetime.fromisoformat(date_obj.replace('Z', '+00:00')).astimezone(tz).strftime('%Y-%m-%d')
-                       if isinstance(date_obj, str) else None)
-                if not day:
-                    continue
-                mental_data[doc.id] = data
-                trends[day] += 1
-                condition = str(data.get('condition', '')).lower().strip()
-                if 'suicidal' in condition or 'suicide' in condition:
-                    distribution["Suicidal"] += 1
-                elif 'depress' in condition or 'depression' in condition:
-                    distribution["Depressed"] += 1
-                elif 'Anxiety' in condition or 'anxiety' in condition:
-                    distribution["Anxiety"] += 1
-                elif 'normal' in condition:
-                    distribution["Normal"] += 1
-                else:
-                    distribution["Other"] += 1
-            except Exception as e:
-                logger.warning(f"Invalid date format in document {doc.id}: {str(e)}")
-                continue
-        last_doc_mental = docs[-1] if docs else None
-
-    columns = ['userName', 'date', 'userMessage', 'botResponse', 'serialNo']
-    structured_data = [{column: data.get(column, None) for column in columns} for data in mental_data.values()]
+        docs = iter_documents(query, fields=MENTAL_HEALTH_ANALYTICS_FIELDS)
+        results = AggregationEngine({
+            'trends': CountByDay(label=day_bucketer().label),
+            'distribution': CountByField(lambda row: condition_bucket(row.get('condition', ''))),
+        }).feed(event_rows(docs, user_names if gender != 'All' else None)).results()
+    distribution.update(results['distribution'])
 
     return {
-        'structured_data': structured_data,
-        'trends': [{"date": day, "count": count} for day, count in sorted(trends.items())],
+        'trends': [{"date": day, "count": count} for day, count in results['trends'].items()],
         'distribution': [{"label": k, "value": v} for k, v in distribution.items()]
     }
 
-def get_medical_bot_analytics(start_date, end_date=None, gender='All',operation='GET'):
-    trends = defaultdict(int)
-    categories = defaultdict(int)
-    medical_assist_data = {}  # Collect all data unfiltered
-    user_lookup = {}
-    last_doc_bot = None
-    last_doc_registrations = None
-    valid_categories = {
-            'susceptibility', 'symptoms', 'exams and tests', 'treatment',
-            'prevention', 'information', 'frequency', 'complications',
-            'causes', 'research', 'outlook', 'considerations', 'inheritance',
-            'stages', 'genetic changes', 'support groups'
-        }
-    try:
-        # Load user lookup based on gender for filtering trends and categories
-        if gender != 'All' or operation == 'POST':
-            while True:
-                queryy = db.collection('registrations').where('gender', '==', gender.lower()).limit(500)
-                if last_doc_registrations:
-                    queryy = queryy.start_after(last_doc_registrations)
-                docss = list(queryy.stream())
-                if not docss:
-                    break
-                user_lookup.update({docu.to_dict().get('name'): docu.to_dict() for docu in docss})
-                last_doc_registrations = docss[-1] if docss else None
-            logger.info(f"Loaded {len(user_lookup)} users from registrations for gender: {gender}")
-
-        # Fetch all medical assistance data without date filtering
-        while True:
-            print('Fetching batch of documents...')
-            query = db.collection('Medical Assistance Bot').order_by('date', direction=firestore.Query.DESCENDING).limit(20)
-            if last_doc_bot:
-                query = query.start_after(last_doc_bot)
-            query = query.limit(500)
-            docs = list(query.stream())
-            
-            print(f"Fetched {len(docs)} documents in this batch")
-            if not docs:  # Break if no more documents are fetched
-                print("No more documents to fetch, breaking loop")
-                break
-
-            for doc in docs:
-                print('Processing document...')
-                data = doc.to_dict()
-                
-                username = data.get('userName')
-                date_obj = data.get('date')
-                if not date_obj:
-                    continue
-                # Parse date for trends and categories
-                try:
-                    day = (date_obj.astimezone(tz).strftime('%Y-%m-%d') if isinstance(date_obj, datetime)
-                           else datetime.fromisoformat(date_obj.replace('Z', '+00:00')).astimezone(tz).strftime('%Y-%m-%d')
-                           if isinstance(date_obj, str) else None)
-                    if not day:
-                        continue
-                except Exception as e:
-                    logger.warning(f"Invalid date format in document {doc.id}: {str(e)}")
-                    continue
-                
-                date_time = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=tz)
-                if operation == 'POST':
-                    if start_date and date_time < start_date:
-                        continue
-                    if end_date and date_time > end_date:
-                        continue
-                if gender != 'All' and username not in user_lookup:
-                    continue
-                medical_assist_data[doc.id] = data
-                # Update trends and categories with filtered data
-                if day:
-                    trends[day] += 1
-                category = data.get('categroryQuestion', 'no Category')
-                if category in valid_categories:
-                    categories[category] += 1
-
-
-            last_doc_bot = docs[-1]  # Update last_doc_bot for the next batch
-
-        # Generate structured data from unfiltered medical_assist_data
-        columns = ['userName', 'date', 'userMessage', 'botResponse', 'serialNo','categroryQuestion']
-        structured_data = [
-            {column: data.get(column, None) for column in columns}
-            for data in medical_assist_data.values()
-        ]  
-        return {
-            'structured_data': structured_data,
-            'trends': [{"date": day, "count": count} for day, count in sorted(trends.items())],
-            'categories': [{"name": k, "count": v} for k, v in sorted(categories.items(), key=lambda x: x[1], reverse=True)]
-        }
-    except Exception as e:
-        logger.error(f"Error in medical bot analytics: {str(e)}")
-        return {'structured_data': [], 'trends': [], 'categories': []}
+def get_medical_bot_analytics(start_date, end_date=None, gender='All', operation='GET', user_names=None):
+    use_rollups = ROLLUPS_ENABLED and gender == 'All'
+    # Names registered with the requested gender, for filtering trends and categories
+    if gender != 'All' and user_names is None:
+        user_names = gender_index.names(gender)
 
-def get_user_analytics(start_date, end_date=None):
-    growth = []
-    total = 0
-    daily_activity = defaultdict(int)
-    try:
-        user_docs = db.collection('users').where('createdAt', '>=', start_date)
-        if end_date:
-            user_docs = user_docs.where('createdAt', '<=', end_date)
-        user_docs = user_docs.order_by('createdAt').stream()
-        login_docs = db.collection('user_logins').where('timestamp', '>=', start_date)
-        if end_date:
-            login_docs = login_docs.where('timestamp', '<=', end_date)
-        login_docs = login_docs.order_by('timestamp').stream()
-        for doc in user_docs:
-            total += 1
-            date = doc.to_dict().get('createdAt')
-            if date:
-                day = (date.astimezone(tz).strftime('%Y-%m-%d') if isinstance(date, datetime)
-                       else date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else None)
-                if day:
-                    growth.append({"date": day, "count": total})
-        for doc in login_docs:
-            date = doc.to_dict().get('timestamp')
-            if date:
-                day = (date.astimezone(tz).strftime('%Y-%m-%d') if isinstance(date, datetime)
-                       else date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else None)
-                if day:
-                    daily_activity[day] += 1
-        return {
-            'growth': growth,
-            'activity': [{"date": day, "count": count} for day, count in sorted(daily_activity.items())]
-        }
-    except Exception as e:
-        logger.error(f"Error in user analytics: {str(e)}")
-        return {'growth': [], 'activity': []}
+    # The date range is applied by Firestore; GET reads the whole history
+    range_start, range_end = medical_bot_day_range(start_date, end_date) if operation == 'POST' else (None, None)
+    if use_rollups:
+        if operation == 'POST':
+            rollup = get_rollup_analytics('Medical Assistance Bot', range_start, range_end)
+        else:
+            rollup = get_rollup_analytics('Medical Assistance Bot')
+        results = {'trends': rollup['trends'], 'categories': rollup.get('category', {})}
+    else:
+        query = db.collection('Medical Assistance Bot')
+        if range_start:
+            query = query.where('date', '>=', range_start)
+        if range_end:
+            query = query.where('date', '<=', range_end)
+        docs = iter_documents(query.order_by('date', direction=firestore.Query.DESCENDING),
+                              fields=MEDICAL_BOT_ANALYTICS_FIELDS)
+        results = AggregationEngine({
+            'trends': CountByDay(label=day_bucketer().label),
+            'categories': CountByField('categroryQuestion', default='no Category', only=MEDICAL_BOT_CATEGORIES),
+        }).feed(event_rows(docs, user_names if gender != 'All' else None)).results()
 
-def get_recent_activity():
-    try:
-        cutoff = datetime.now(tz) - timedelta(days=7)
-        query = db.collection('user_logins').where('timestamp', '>=', cutoff).order_by('timestamp', direction=firestore.Query.DESCENDING)
-        docs = list(query.stream())
-        recent_logs = []
-        for doc in docs:
-            data = doc.to_dict()
-            user_id = data.get('userId')
-            if not user_id:
-                continue
-            user_doc = db.collection('users').document(user_id).get()
-            user_data = user_doc.to_dict() if user_doc.exists else {}
-            timestamp = data.get('timestamp')
-            recent_logs.append({
-                'email': user_data.get('email', 'Unknown'),
-                'feature': data.get('feature', 'Login'),
-                'timestamp': (timestamp.astimezone(tz).isoformat() if isinstance(timestamp, datetime) else timestamp or '')
-            })
-        return recent_logs
-    except Exception as e:
-        logger.error(f"Error fetching recent activity: {str(e)}")
-        return []
-
-def analyze_feedback_sentiment():
-    feedback = {}  # Collect all data unfiltered
-    positive_words = [
-        'good', 'great', 'excellent', 'awesome', 'love', 'happy', 'fantastic',
-        'wonderful', 'amazing', 'perfect', 'superb', 'outstanding', 'brilliant',
-        'fabulous', 'terrific', 'marvelous', 'delightful', 'pleased', 'joyful',
-        'ecstatic', 'thrilled', 'satisfied', 'glad', 'content', 'cheerful',
-        'jubilant', 'elated', 'grateful', 'optimistic', 'hopeful', 'blissful',
-        'radiant', 'peaceful', 'lucky', 'fortunate', 'victorious', 'proud',
-        'admirable', 'charming', 'enjoyable', 'pleasant', 'refreshing', 'reliable',
-        'valuable', 'superior', 'first-class', 'stellar', 'phenomenal', 'incredible',
-        'exceptional', 'splendid', 'heavenly', 'divine', 'admirable', 'appealing',
-        'captivating', 'enchanting', 'enthralling', 'magnificent', 'remarkable',
-        'sublime', 'upbeat', 'vibrant', 'wholesome', 'worthy', 'yummy', 'zealous',
-        'admired', 'affectionate', 'agreeable', 'blissful', 'breathtaking', 'commendable',
-        'dazzling', 'elegant', 'exhilarating', 'flawless', 'glorious', 'heartwarming',
-        'ideal', 'jovial', 'kind', 'laudable', 'majestic', 'noble', 'overjoyed',
-        'paradise', 'quality', 'resplendent', 'stellar', 'tranquil', 'unreal', 'valued',
-        'wondrous', 'excited', 'fun', 'loved', 'nice', 'positive', 'sweet', 'truthful',
-        'upgraded', 'vivid', 'welcoming', 'youthful', 'zesty'
-    ]
-    negative_words = [
-        'bad', 'poor', 'terrible', 'hate', 'angry', 'sad', 'awful', 'horrible',
-        'disgusting', 'ugly', 'evil', 'worst', 'painful', 'annoying', 'anxiety',
-        'appalling', 'atrocious', 'boring', 'broken', 'cruel', 'crazy',
-        'damaged', 'depressed', 'dire', 'dirty', 'disappointing', 'disastrous',
-        'dreadful', 'dreary', 'fearful', 'filthy', 'foul', 'frightening', 'ghastly',
-        'grave', 'greedy', 'grim', 'gross', 'gruesome', 'hard', 'harmful', 'harsh',
-        'hideous', 'hostile', 'hurtful', 'icky', 'infuriating', 'irritating',
-        'jealous', 'lousy', 'lumpy', 'malicious', 'mean', 'messy', 'misshapen',
-        'missing', 'mistaken', 'moaning', 'moldy', 'monstrous', 'naughty', 'nasty',
-        'noxious', 'objectionable', 'odious', 'offensive', 'old', 'oppressive',
-        'pathetic', 'petty', 'plain', 'poisonous', 'prejudiced', 'questionable',
-        'repulsive', 'revengeful', 'revolting', 'rotten', 'ruthless', 'sad', 'scary',
-        'sick', 'sickening', 'sinister', 'slimy', 'smelly', 'sore', 'sorry', 'spiteful',
-        'sticky', 'stinky', 'stormy', 'stressful', 'stuck', 'stupid', 'substandard',
-        'suspect', 'suspicious', 'tense', 'terrible', 'threatening', 'unhappy',
-        'unjust', 'unlucky', 'unpleasant', 'unsatisfactory', 'unsightly', 'untoward',
-        'unwanted', 'unwelcome', 'unwholesome', 'unwieldy', 'unwise', 'upset', 'vice',
-        'vicious', 'vile', 'villainous', 'vindictive', 'wary', 'weary', 'wicked',
-        'woeful', 'worthless', 'wounded', 'yucky', 'zero'
-    ]
-    
-    last_doc_bot = None
+    return {
+        'trends': [{"date": day, "count": count} for day, count in results['trends'].items()],
+        'categories': [{"name": k, "count": v} for k, v in sorted(results['categories'].items(), key=lambda x: x[1], reverse=True)]
+    }
 
-    try:
-        while True:
-            print('Fetching batch of documents...')
-            query = db.collection('feedback').order_by('date', direction=firestore.Query.DESCENDING).limit(20)
-            if last_doc_bot:
-                query = query.start_after(last_doc_bot)
-            query = query.limit(500)
-            docs = list(query.stream())
-            
-            print(f"Fetched {len(docs)} documents in this batch")
-            if not docs:  # Break if no more documents are fetched
-                print("No more documents to fetch, breaking loop")
-                break
-            sentiment = {"positive": 0, "neutral": 0, "negative": 0}
-            for doc in docs:
-                print('Processing document...')
-                data = doc.to_dict()
-                feedback[doc.id] = data
-                message = doc.to_dict().get('message', '').lower()
-                if any(word in message for word in positive_words):
-                    sentiment["positive"] += 1
-                elif any(word in message for word in negative_words):
-                    sentiment["negative"] += 1
-                else:
-                    sentiment["neutral"] += 1
-
-            last_doc_bot = docs[-1]  # Update last_doc_bot for the next batch
-
-        # Generate structured data from unfiltered medical_assist_data
-        columns = ['name', 'date', 'message', 'email']
-        structured_data = [
-            {column: data.get(column, None) for column in columns}
-            for data in feedback.values()
-        ]
-        
+def get_user_timeline(start_date, end_date=None, active_windows=ACTIVE_USER_WINDOWS):
+    """Build the user growth, login activity and active-user sections from one scan of each collection"""
+    now = datetime.now(tz)
+    label = day_bucketer().label
+    if ROLLUPS_ENABLED:
+        trends = dict(sorted(get_rollup_analytics('users', start_date, end_date)['trends'].items()))
+    else:
+        query = db.collection('users').where('createdAt', '>=', start_date)
+        if end_date:
+            query = query.where('createdAt', '<=', end_date)
+        docs = iter_documents(query.order_by('createdAt'), fields=['createdAt'])
+        trends = AggregationEngine({'trends': CountByDay(label=label)}).feed(
+            event_rows(docs, date_field='createdAt')).results()['trends']
+    growth = np.cumsum(list(trends.values()), dtype=np.int64).tolist()
+
+    cutoffs = {days: now - timedelta(days=days) for days in active_windows}
+    share_scan = bool(cutoffs) and start_date <= now and (end_date is None or end_date >= min(cutoffs.values()))
+    in_range = lambda ts: ts >= start_date and (end_date is None or ts <= end_date)
+    aggregators = {'activity': CountByDay(
+        field=lambda row: row['day'] if not isinstance(row['timestamp'], datetime) or in_range(row['timestamp']) else None,
+        label=label)}
+    login_start, login_end = start_date, end_date
+    if share_scan:
+        aggregators.update({
+            days: DistinctCount('userId', where=lambda row, cutoff=cutoff: (
+                row.get('userId') and isinstance(row['timestamp'], datetime) and row['timestamp'] >= cutoff))
+            for days, cutoff in cutoffs.items()})
+        login_start, login_end = min(start_date, min(cutoffs.values())), None
+    query = db.collection('user_logins').where('timestamp', '>=', login_start)
+    if login_end:
+        query = query.where('timestamp', '<=', login_end)
+    docs = iter_documents(query.order_by('timestamp'), fields=['userId', 'timestamp'])
+    results = AggregationEngine(aggregators).feed(event_rows(docs, date_field='timestamp')).results()
 
-        return {
-            'structured_data': structured_data,
-            
-            'sentiment': [{"name": k.capitalize(), "count": v} for k, v in sorted(sentiment.items(), key=lambda x: x[1], reverse=True)]
-        }
+    return {
+        'trends': [{"date": day, "count": count} for day, count in trends.items()],
+        'growth': [{"date": day, "count": total} for day, total in zip(trends, growth)],
+        'activity': [{"date": day, "count": count} for day, count in results['activity'].items()],
+        'active_users': ({days: results[days] for days in cutoffs} if share_scan
+                         else get_active_user_windows(active_windows))
+    }
 
-    except Exception as e:
-        logger.error(f"Error in medical bot analytics: {str(e)}")
-        return {'structured_data': [], 'sentiment':[] }
-    
-    
+def get_user_emails(user_ids):
+    """Return ``{userId: email}``, fetching unknown users with batched ``get_all`` calls"""
+    emails = {}
+    missing = []
+    with user_email_lock:
+        for user_id in dict.fromkeys(user_ids):
+            if user_id in user_email_cache:
+                emails[user_id] = user_email_cache[user_id]
+            else:
+                missing.append(user_id)
+    for i in range(0, len(missing), USER_LOOKUP_BATCH_SIZE):
+        refs = [db.collection('users').document(user_id) for user_id in missing[i:i + USER_LOOKUP_BATCH_SIZE]]
+        found = {}
+        for snapshot in db.get_all(refs, field_paths=['email']):
+            if snapshot.exists:
+                found[snapshot.id] = (snapshot.to_dict() or {}).get('email', 'Unknown')
+        with user_email_lock:
+            user_email_cache.update(found)
+        emails.update(found)
+    return emails
 
-def get_recent_feedback():
-    try:
-        feedbacks = list(db.collection('feedback').order_by('date', direction=firestore.Query.DESCENDING).limit(20).stream())
-        feedback_comments = []
-        for doc in feedbacks:
-            doc_data = doc.to_dict()
-            date = doc_data.get('date')
-            feedback_comments.append({
-                '_id': doc.id,
-                'name': doc_data.get('name', 'Anonymous'),
-                'email': doc_data.get('email', 'Unknown'),
-                'message': doc_data.get('message', ''),
-                'reply': doc_data.get('reply', ''),
-                'replyTimestamp': format_timestamp(doc_data.get('replyTimestamp')),
-                'timestamp': (date.astimezone(tz).isoformat() if isinstance(date, datetime) else date or '')
-            })
-        logger.info(f"Retrieved {len(feedback_comments)} feedback comments")
-        return feedback_comments
-    except Exception as e:
-        logger.error(f"Error fetching recent feedback: {str(e)}")
-        return []
+def get_recent_activity():
+    cutoff = datetime.now(tz) - timedelta(days=7)
+    query = db.collection('user_logins').where('timestamp', '>=', cutoff).order_by('timestamp', direction=firestore.Query.DESCENDING)
+    docs = iter_documents(query, page_size=RECENT_ACTIVITY_PAGE_SIZE, fields=['userId', 'feature', 'timestamp'],
+                          limit=RECENT_ACTIVITY_LIMIT)
+    logins = [data for data in (doc.to_dict() for doc in docs) if data.get('userId')]
+    emails = get_user_emails(data['userId'] for data in logins)
+    recent_logs = []
+    for data in logins:
+        timestamp = data.get('timestamp')
+        recent_logs.append({
+            'email': emails.get(data['userId'], 'Unknown'),
+            'feature': data.get('feature', 'Login'),
+            'timestamp': (timestamp.astimezone(tz).isoformat() if isinstance(timestamp, datetime) else timestamp or '')
+        })
+    return recent_logs
+
+# Sentiment word lists, matched against the words of each feedback message.
+POSITIVE_WORDS = frozenset([
+    'good', 'great', 'excellent', 'awesome', 'love', 'happy', 'fantastic',
+    'wonderful', 'amazing', 'perfect', 'superb', 'outstanding', 'brilliant',
+    'fabulous', 'terrific', 'marvelous', 'delightful', 'pleased', 'joyful',
+    'ecstatic', 'thrilled', 'satisfied', 'glad', 'content', 'cheerful',
+    'jubilant', 'elated', 'grateful', 'optimistic', 'hopeful', 'blissful',
+    'radiant', 'peaceful', 'lucky', 'fortunate', 'victorious', 'proud',
+    'admirable', 'charming', 'enjoyable', 'pleasant', 'refreshing', 'reliable',
+    'valuable', 'superior', 'first-class', 'stellar', 'phenomenal', 'incredible',
+    'exceptional', 'splendid', 'heavenly', 'divine', 'admirable', 'appealing',
+    'captivating', 'enchanting', 'enthralling', 'magnificent', 'remarkable',
+    'sublime', 'upbeat', 'vibrant', 'wholesome', 'worthy', 'yummy', 'zealous',
+    'admired', 'affectionate', 'agreeable', 'blissful', 'breathtaking', 'commendable',
+    'dazzling', 'elegant', 'exhilarating', 'flawless', 'glorious', 'heartwarming',
+    'ideal', 'jovial', 'kind', 'laudable', 'majestic', 'noble', 'overjoyed',
+    'paradise', 'quality', 'resplendent', 'stellar', 'tranquil', 'unreal', 'valued',
+    'wondrous', 'excited', 'fun', 'loved', 'nice', 'positive', 'sweet', 'truthful',
+    'upgraded', 'vivid', 'welcoming', 'youthful', 'zesty'
+])
+NEGATIVE_WORDS = frozenset([
+    'bad', 'poor', 'terrible', 'hate', 'angry', 'sad', 'awful', 'horrible',
+    'disgusting', 'ugly', 'evil', 'worst', 'painful', 'annoying', 'anxiety',
+    'appalling', 'atrocious', 'boring', 'broken', 'cruel', 'crazy',
+    'damaged', 'depressed', 'dire', 'dirty', 'disappointing', 'disastrous',
+    'dreadful', 'dreary', 'fearful', 'filthy', 'foul', 'frightening', 'ghastly',
+    'grave', 'greedy', 'grim', 'gross', 'gruesome', 'hard', 'harmful', 'harsh',
+    'hideous', 'hostile', 'hurtful', 'icky', 'infuriating', 'irritating',
+    'jealous', 'lousy', 'lumpy', 'malicious', 'mean', 'messy', 'misshapen',
+    'missing', 'mistaken', 'moaning', 'moldy', 'monstrous', 'naughty', 'nasty',
+    'noxious', 'objectionable', 'odious', 'offensive', 'old', 'oppressive',
+    'pathetic', 'petty', 'plain', 'poisonous', 'prejudiced', 'questionable',
+    'repulsive', 'revengeful', 'revolting', 'rotten', 'ruthless', 'sad', 'scary',
+    'sick', 'sickening', 'sinister', 'slimy', 'smelly', 'sore', 'sorry', 'spiteful',
+    'sticky', 'stinky', 'stormy', 'stressful', 'stuck', 'stupid', 'substandard',
+    'suspect', 'suspicious', 'tense', 'terrible', 'threatening', 'unhappy',
+    'unjust', 'unlucky', 'unpleasant', 'unsatisfactory', 'unsightly', 'untoward',
+    'unwanted', 'unwelcome', 'unwholesome', 'unwieldy', 'unwise', 'upset', 'vice',
+    'vicious', 'vile', 'villainous', 'vindictive', 'wary', 'weary', 'wicked',
+    'woeful', 'worthless', 'wounded', 'yucky', 'zero'
+])
+FEEDBACK_WORD_RE = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+# Sentiment per feedback document id, valid while the document's update_time
+# is unchanged, so only new or edited feedback is classified again.
+feedback_sentiment_cache = LRUCache(maxsize=int(os.getenv('FEEDBACK_SENTIMENT_CACHE_SIZE', 20000)))
+feedback_sentiment_lock = threading.Lock()
+
+def classify_sentiment(message):
+    """Return 'positive', 'negative' or 'neutral' for a feedback message"""
+    tokens = FEEDBACK_WORD_RE.findall(str(message or '').lower())
+    words = set(tokens)
+    # Hyphenated words count whole ("first-class") and by their parts.
+    words.update(part for token in tokens if '-' in token for part in token.split('-'))
+    if not words.isdisjoint(POSITIVE_WORDS):
+        return 'positive'
+    if not words.isdisjoint(NEGATIVE_WORDS):
+        return 'negative'
+    return 'neutral'
+
+def feedback_sentiment(doc, message):
+    """Classify a feedback document, reusing the cached result while it is unedited"""
+    stamp = getattr(doc, 'update_time', None)
+    with feedback_sentiment_lock:
+        cached = feedback_sentiment_cache.get(doc.id)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        return cached[1]
+    label = classify_sentiment(message)
+    if stamp is not None:
+        with feedback_sentiment_lock:
+            feedback_sentiment_cache[doc.id] = (stamp, label)
+    return label
+
+def format_feedback_comment(doc):
+    """Shape a feedback document for the admin feedback/reply panel"""
+    doc_data = doc.to_dict()
+    date = doc_data.get('date')
+    return {
+        '_id': doc.id,
+        'name': doc_data.get('name', 'Anonymous'),
+        'email': doc_data.get('email', 'Unknown'),
+        'message': doc_data.get('message', ''),
+        'reply': doc_data.get('reply', ''),
+        'replyTimestamp': format_timestamp(doc_data.get('replyTimestamp')),
+        'timestamp': (date.astimezone(tz).isoformat() if isinstance(date, datetime) else date or '')
+    }
+
+def get_feedback_analytics(comment_limit=20, recent_limit=5):
+    """Build every feedback section of the dashboard from one scan"""
+    sentiment = {"positive": 0, "neutral": 0, "negative": 0}
+    count, comments, recent = 0, [], []
+
+    query = db.collection('feedback').order_by('date', direction=firestore.Query.DESCENDING)
+    for doc in iter_documents(query):
+        count += 1
+        sentiment[feedback_sentiment(doc, doc.to_dict().get('message'))] += 1
+        if len(comments) < comment_limit:
+            comments.append(format_feedback_comment(doc))
+        if len(recent) < recent_limit:
+            recent.append(format_document(doc))
+    logger.info(f"Retrieved {count} feedback documents")
+    return {
+        'count': count,
+        'sentiment': [{"name": k.capitalize(), "count": v} for k, v in sorted(sentiment.items(), key=lambda x: x[1], reverse=True)],
+        'comments': comments,
+        'recent': recent
+    }
 
 @app.route('/admin/feedback/reply', methods=['POST'])
 def reply_to_feedback():
@@ -684,6 +894,7 @@ def reply_to_feedback():
             'replyTimestamp': reply_timestamp,
             'status': 'replied'
         })
+        invalidate_sections('feedback')
 
         return jsonify({
             '_id': feedback_id,
@@ -695,45 +906,60 @@ def reply_to_feedback():
         logger.error(f"Error replying to feedback: {str(e)}", exc_info=True)
         return jsonify({'error': 'Failed to send reply'}), 500
 
+def get_active_user_windows(windows=ACTIVE_USER_WINDOWS):
+    """Count distinct active users per trailing window from one login scan, as ``{days: count}``"""
+    now = datetime.now(tz)
+    cutoffs = {days: now - timedelta(days=days) for days in windows}
+    engine = AggregationEngine(
+        {days: DistinctCount('userId', where=lambda row, cutoff=cutoff: row['timestamp'] >= cutoff)
+         for days, cutoff in cutoffs.items()},
+        prepare=lambda row: row if row.get('userId') and isinstance(row.get('timestamp'), datetime) else None)
+    query = db.collection('user_logins').where('timestamp', '>=', min(cutoffs.values()))
+    docs = iter_documents(query.order_by('timestamp'), fields=['userId', 'timestamp'])
+    return engine.feed(doc.to_dict() for doc in docs).results()
+
 def get_active_users_count(days):
-    try:
-        cutoff = datetime.now(tz) - timedelta(days=days)
-        query = db.collection('user_logins').where('timestamp', '>=', cutoff)
-        return len(set(doc.to_dict().get('userId', '') for doc in query.stream() if doc.exists and doc.to_dict().get('userId')))
-    except Exception as e:
-        logger.error(f"Error in get_active_users_count: {str(e)}")
-        return 0
+    return get_active_user_windows((days,))[days]
+
+def count_documents(query, counter=None):
+    """Count the documents matched by ``query`` from its counters document or a server-side count"""
+    if counter:
+        snapshot = db.collection('counters').document(counter).get()
+        count = (snapshot.to_dict() or {}).get('count') if snapshot.exists else None
+        if isinstance(count, (int, float)) and not isinstance(count, bool):
+            return int(count)
+    result = query.count(alias='count').get()
+    return int(result[0][0].value)
 
 def get_new_users_count(days):
-    try:
-        cutoff = datetime.now(tz) - timedelta(days=days)
-        return len(list(db.collection('users').where('createdAt', '>=', cutoff).get()))
-    except Exception as e:
-        logger.error(f"Error in get_new_users_count: {str(e)}")
-        return 0
+    cutoff = datetime.now(tz) - timedelta(days=days)
+    return count_documents(db.collection('users').where('createdAt', '>=', cutoff))
 
-def calculate_retention_rate(total_users=None):
+def calculate_retention_rate(total_users=None, active_week=None):
     try:
-        active_week = get_active_users_count(7)
+        if active_week is None:
+            active_week = get_active_users_count(7)
         if total_users is None:
-            total_users = len(list(db.collection('users').get()))
+            total_users = count_documents(db.collection('users'), 'users')
         return round((active_week / total_users) * 100, 2) if total_users > 0 else 0.0
     except Exception as e:
         logger.error(f"Error in calculate_retention_rate: {str(e)}")
         return 0.0
 
-def get_recent_entries(collection_name, limit=5):
-    try:
-        docs = db.collection(collection_name).order_by('date', direction=firestore.Query.DESCENDING).limit(limit).stream()
-        return [format_document(doc) for doc in docs]
-    except Exception as e:
-        logger.error(f"Error in get_recent_entries for {collection_name}: {str(e)}")
-        return []
+# Registrations also hold the sign-up email and password; only these are served
+# (and so cached on disk by the shared stats cache).
+REGISTRATION_FIELDS = ['serialNo', 'userId', 'name', 'gender', 'registeredAt']
+
+def get_recent_entries(collection_name, limit=5, order_field='date', fields=None):
+    query = db.collection(collection_name).order_by(order_field, direction=firestore.Query.DESCENDING).limit(limit)
+    if fields:
+        query = query.select(fields)
+    return [format_document(doc) for doc in query.stream()]
 
 def format_document(doc):
     try:
         data = doc.to_dict()
-        timestamp = data.get('date') or data.get('timestamp') or data.get('createdAt')
+        timestamp = data.get('date') or data.get('timestamp') or data.get('createdAt') or data.get('registeredAt')
         return {
             "id": doc.id,
             **data,
@@ -743,134 +969,531 @@ def format_document(doc):
         logger.error(f"Error formatting document {doc.id}: {str(e)}")
         return {"id": doc.id, "error": "Failed to format document"}
     
-def get_user_growth_analytics(start_date, end_date=None):
-    """Fetch user growth data with pagination."""
-    trends = defaultdict(int)
-    last_doc = None
+# --- Record Pages ---
+# Raw rows for the admin tables, one page at a time. ``/admin/stats`` embeds
+# the first page of each source and the tables request the rest from
+# ``/admin/records/<source>`` with the returned ``next_cursor``.
+RECORDS_PAGE_SIZE = int(os.getenv('RECORDS_PAGE_SIZE', 50))
+RECORDS_MAX_PAGE_SIZE = 500
+RECORD_SOURCES = {
+    'disease': {'collection': 'Disease Predictor', 'columns': DISEASE_COLUMNS,
+                'sorts': ('date', 'serialNo'), 'order': 'desc', 'gender_field': 'gender',
+                'dictionary': ('disease', 'doctor', 'riskLevel')},
+    'mental-health': {'collection': 'Mental Health Analyzer', 'columns': MENTAL_HEALTH_COLUMNS,
+                      'sorts': ('date', 'serialNo'), 'order': 'desc'},
+    'medical-bot': {'collection': 'Medical Assistance Bot', 'columns': MEDICAL_BOT_COLUMNS,
+                    'sorts': ('date', 'serialNo'), 'order': 'desc', 'dictionary': ('categroryQuestion',)},
+    'feedback': {'collection': 'feedback', 'columns': FEEDBACK_COLUMNS,
+                 'sorts': ('date',), 'order': 'desc', 'gendered': False},
+}
+
+def encode_cursor(state):
+    """Pack a page position and its filters into an opaque URL-safe token"""
+    raw = json.dumps(state, separators=(',', ':'), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
     try:
-        while True:
-            query = db.collection('users') \
-                     .where('createdAt', '>=', start_date)
-            if end_date:
-                query = query.where('createdAt', '<=', end_date)
-            query = query.order_by('createdAt').limit(500)
-            if last_doc:
-                query = query.start_after(last_doc)
-            docs = list(query.stream())
-            if not docs:
-                break
-            for doc in docs:
-                data = doc.to_dict()
-                date_obj = data.get('createdAt')
-                if not date_obj:
-                    continue
-                day = (date_obj.astimezone(tz).strftime('%Y-%m-%d') 
-                       if isinstance(date_obj, datetime) 
-                       else date_obj.strftime('%Y-%m-%d') if hasattr(date_obj, 'strftime') 
-                       else None)
-                if day:
-                    trends[day] += 1
-            last_doc = docs[-1] if docs else None
-        return [{"date": day, "count": count} for day, count in sorted(trends.items(), key=lambda x: x[0])]
+        state = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(state, dict) or state.get('source') not in RECORD_SOURCES or not state.get('after'):
+        raise ValueError("Invalid cursor")
+    return state
+
+def columnar_records(records, columns, dictionary=()):
+    """Transpose rows into one array per column, dictionary-encoding the ``dictionary`` columns"""
+    encoded = {'rowCount': len(records), 'columns': {}, 'dictionaries': {}}
+    for column in columns:
+        values = [record.get(column) for record in records]
+        if column in dictionary:
+            codes = {}
+            encoded['columns'][column] = [codes.setdefault(value, len(codes)) for value in values]
+            encoded['dictionaries'][column] = list(codes)
+        else:
+            encoded['columns'][column] = values
+    return encoded
+
+def fast_json_response(payload, status=200):
+    """Like jsonify(), through orjson when it is installed; dates are encoded the same way"""
+    if orjson is None:
+        return jsonify(payload), status
+    body = orjson.dumps(payload, default=app.json.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return Response(body, status=status, mimetype='application/json')
+
+def parse_filter_date(value):
+    """Parse an ISO 8601 filter date into the dashboard timezone (None if empty)"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(tz)
+
+def fetch_records(source, start_date=None, end_date=None, gender='All', sort='date', order=None,
+                  page_size=None, after=None, user_names=None):
+    """Return one page of rows from a record source plus the cursor of the next page"""
+    spec = RECORD_SOURCES[source]
+    order = order or spec['order']
+    page_size = RECORDS_PAGE_SIZE if page_size is None else int(page_size)
+    if sort not in spec['sorts']:
+        raise ValueError(f"sort must be one of: {', '.join(spec['sorts'])}")
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    if not 1 <= page_size <= RECORDS_MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {RECORDS_MAX_PAGE_SIZE}")
+
+    collection = db.collection(spec['collection'])
+    query = collection
+    if start_date:
+        query = query.where('date', '>=', start_date)
+    if end_date:
+        query = query.where('date', '<=', end_date)
+    if gender != 'All' and spec.get('gendered', True):
+        if user_names is None:
+            user_names = gender_index.names(gender)
+        if spec.get('gender_field'):
+            query = query.where(spec['gender_field'], '==', gender.lower().capitalize())
+    else:
+        user_names = None
+    direction = firestore.Query.DESCENDING if order == 'desc' else firestore.Query.ASCENDING
+    query = query.order_by(sort, direction=direction)
+    if after:
+        snapshot = collection.document(after).get()
+        if not snapshot.exists:
+            raise ValueError("Cursor is no longer valid")
+        query = query.start_after(snapshot)
+
+    # One extra row tells whether another page exists
+    records, last_id = [], None
+    docs = iter_documents(query, page_size=page_size + 1, fields=spec['columns'],
+                          limit=None if user_names is not None else page_size + 1, prefetch=False)
+    for doc in docs:
+        data = doc.to_dict()
+        if user_names is not None and data.get('userName') not in user_names:
+            continue
+        if len(records) == page_size:
+            break
+        records.append({column: data.get(column) for column in spec['columns']})
+        last_id = doc.id
+    else:
+        last_id = None
+
+    next_cursor = None
+    if last_id is not None:
+        next_cursor = encode_cursor({
+            'source': source, 'after': last_id, 'sort': sort, 'order': order, 'page_size': page_size,
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'gender': gender,
+        })
+    return {'records': records, 'next_cursor': next_cursor}
+
+@app.route('/admin/records/<source>', methods=['GET', 'POST'])
+def get_records(source):
+    """Page through the raw rows behind an admin table"""
+    if source not in RECORD_SOURCES:
+        return jsonify({"error": f"Unknown record source '{source}'"}), 404
+    params = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    record_format = params.get('format', 'rows')
+    if record_format not in ('rows', 'columnar'):
+        return jsonify({"error": "format must be 'rows' or 'columnar'"}), 400
+    try:
+        if params.get('cursor'):
+            state = decode_cursor(params['cursor'])
+            if state['source'] != source:
+                raise ValueError("Cursor belongs to another record source")
+            start_date = parse_filter_date(state.get('start_date'))
+            end_date = parse_filter_date(state.get('end_date'))
+            gender, sort, order = state.get('gender', 'All'), state.get('sort', 'date'), state.get('order')
+            page_size, after = params.get('page_size', state.get('page_size')), state['after']
+        else:
+            start_date = parse_filter_date(params.get('start_date'))
+            end_date = parse_filter_date(params.get('end_date'))
+            gender, sort, order = params.get('gender', 'All'), params.get('sort', 'date'), params.get('order')
+            page_size, after = params.get('page_size'), None
+        if start_date and end_date and start_date > end_date:
+            return jsonify({"error": "start_date cannot be after end_date"}), 400
+        if gender not in ['Male', 'Female', 'All']:
+            return jsonify({"error": "Invalid gender value"}), 400
+        page = fetch_records(source, start_date, end_date, gender, sort, order, page_size, after)
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Invalid records request for {source}: {str(e)}")
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error in user growth analytics: {str(e)}")
-        return []
+        logger.error(f"Error fetching {source} records: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to fetch records"}), 500
+    if record_format == 'columnar':
+        spec = RECORD_SOURCES[source]
+        return fast_json_response({"source": source, "format": "columnar", "next_cursor": page['next_cursor'],
+                                   **columnar_records(page['records'], spec['columns'], spec.get('dictionary', ()))})
+    return jsonify({"source": source, **page})
+
+# --- Stats Sections ---
+# /admin/stats is assembled from independently cached sections. Each section
+# has its own TTL and cache key (its name, plus the normalised filter for
+# sections that depend on it); only expired sections are recomputed.
+
+def normalise_stats_filters(start_date, end_date, gender):
+    """Round a POST filter to whole days in ``tz``: ``(first_day, last_day, gender)``"""
+    now = datetime.now(tz)
+    first_day = (start_date or now - timedelta(days=30)).astimezone(tz).date()
+    last_day = min((end_date or now).astimezone(tz).date(), now.date())
+    return first_day, last_day, gender
+
+class StatsFilters:
+    """Date range and gender a stats payload is built for"""
+
+    def __init__(self, start_date=None, end_date=None, gender='All', operation='GET'):
+        self.start_date, self.end_date = start_date, end_date
+        self.gender, self.operation = gender, operation
+        self._counters = None
+        self.historical = operation == 'POST' and end_date is not None
+        if operation == 'GET':
+            self.key = f"GET:{datetime.now(tz).date().isoformat()}"
+        else:
+            last_day = end_date.astimezone(tz).date() if end_date else datetime.now(tz).date()
+            self.key = f"POST:{start_date.astimezone(tz).date().isoformat()}:{last_day.isoformat()}:{gender}"
+
+    @classmethod
+    def for_post(cls, start_date, end_date, gender):
+        first_day, last_day, gender = normalise_stats_filters(start_date, end_date, gender)
+        end = None
+        if last_day < datetime.now(tz).date():
+            end = day_bounds(last_day, tz)[1] - timedelta(microseconds=1)
+        return cls(day_bounds(first_day, tz)[0], end, gender, 'POST')
+
+    def range(self):
+        now = datetime.now(tz)
+        return self.start_date or now - timedelta(days=30), self.end_date or now
+
+    def user_names(self):
+        return gender_index.names(self.gender) if self.gender != 'All' else None
+
+    def counters(self):
+        """The counters documents this request is built against, read once"""
+        if self._counters is None:
+            self._counters = read_counters()
+        return self._counters
+
+class StatsSection:
+    """One independently cached part of the /admin/stats payload"""
+
+    def __init__(self, name, compute, ttl, collections=(), depends=(), emit=None, default=None, filtered=True):
+        self.name = name
+        self.compute = compute
+        self.ttl = ttl
+        self.collections = tuple(collections)
+        self.depends = tuple(depends)
+        self.emit = emit
+        self.default = default
+        self.filtered = filtered
+
+def read_counters():
+    """The counters documents, from the watcher while it is live"""
+    if counter_versions.live:
+        return counter_versions.documents()
+    return {doc.id: doc.to_dict() for doc in db.collection('counters').get() if doc.exists}
+
+def stats_basic(filters, inputs):
+    counters, user_counts = inputs['counters'], inputs['user_counts']
+    active_users = inputs['user_timeline']['active_users'] or {days: 0 for days in ACTIVE_USER_WINDOWS}
+    total_users = user_counts['total_users']
+    return {
+        "total_users": total_users or 0,
+        "active_today": active_users[1],
+        "active_week": active_users[7],
+        "active_month": active_users[30],
+        "disease_predictions": counters.get('Disease Predictor', {}).get('count', 0),
+        "medical_condition_predictions": counters.get('Medical Assistance Bot', {}).get('count', 0),
+        "chatbot_interactions": counters.get('Medical Assistance Bot', {}).get('count', 0),
+        "mental_health_assessments": counters.get('Mental Health Analyzer', {}).get('count', 0),
+        "new_users_week": user_counts['new_users_week'] or 0,
+        "retention_rate": calculate_retention_rate(total_users, active_users[7]) or 0.0,
+        "feedbacks": inputs['feedback_count']
+    }
 
+def stats_records(source):
+    """Section computing the first table page of ``source`` for the filter"""
+    def compute(filters, inputs):
+        start_date, end_date = filters.range()
+        if source == 'feedback':
+            return fetch_records('feedback')
+        if source == 'mental-health' and filters.operation != 'POST':
+            start_date = end_date = None
+        if source == 'medical-bot':
+            start_date, end_date = medical_bot_day_range(start_date, end_date) if filters.operation == 'POST' else (None, None)
+        return fetch_records(source, start_date, end_date, filters.gender, user_names=filters.user_names())
+    return compute
+
+def emit_records(source, key):
+    return lambda page: {'analytics': {key: page['records'], 'recordCursors': {source: page['next_cursor']}}}
+
+EMPTY_PAGE = {'records': [], 'next_cursor': None}
+STATS_SECTIONS = {section.name: section for section in [
+    StatsSection('counters', lambda f, i: f.counters(),
+                 STATS_RECENT_TTL, ['counters'], default={}, filtered=False),
+    StatsSection('user_counts', lambda f, i: {'total_users': count_documents(db.collection('users'), 'users'),
+                                              'new_users_week': get_new_users_count(7)},
+                 STATS_RECENT_TTL, ['users', 'counters'], default={'total_users': 0, 'new_users_week': 0}, filtered=False),
+    StatsSection('user_timeline', lambda f, i: get_user_timeline(*f.range()), STATS_CACHE_TTL, ['users', 'user_logins'],
+                 emit=lambda v: {'analytics': {'userGrowth': v['trends'], 'userActivity': v['activity']}},
+                 default={'trends': [], 'growth': [], 'activity': [], 'active_users': None}),
+    StatsSection('feedback', lambda f, i: get_feedback_analytics(), STATS_RECENT_TTL, ['feedback'],
+                 emit=lambda v: {'analytics': {'feedbackSentiment': v['sentiment']},
+                                 'recent_activity': {'feedback': v['comments'], 'recentFeedbacks': v['recent']}},
+                 default={'count': 0, 'sentiment': [], 'comments': [], 'recent': []}, filtered=False),
+    StatsSection('feedback_count', lambda f, i: count_documents(db.collection('feedback')), STATS_RECENT_TTL, ['feedback'],
+                 default=0, filtered=False),
+    StatsSection('basic_stats', stats_basic, STATS_RECENT_TTL,
+                 depends=['counters', 'user_counts', 'user_timeline', 'feedback_count'],
+                 emit=lambda v: {'basic_stats': v},
+                 default={'total_users': 0, 'active_today': 0, 'active_week': 0, 'active_month': 0, 'disease_predictions': 0,
+                          'medical_condition_predictions': 0, 'chatbot_interactions': 0, 'mental_health_assessments': 0,
+                          'new_users_week': 0, 'retention_rate': 0.0, 'feedbacks': 0}),
+    StatsSection('disease', lambda f, i: get_enhanced_disease_analytics(*f.range(), f.gender, f.operation, f.user_names()),
+                 STATS_CACHE_TTL, ['Disease Predictor'],
+                 emit=lambda v: {'analytics': {'diseaseTrends': v['trends'], 'diseaseCategories': v['categories'],
+                                               'diseaseRiskLevels': v['risk_levels'], 'diseaseDoctors': v['doctors'],
+                                               'diseaseMedicine': v['cures']}},
+                 default={'trends': [], 'categories': [], 'risk_levels': [], 'doctors': [], 'cures': []}),
+    StatsSection('mental_health', lambda f, i: get_mental_health_analytics(*f.range(), f.gender, f.operation, f.user_names()),
+                 STATS_CACHE_TTL, ['Mental Health Analyzer'],
+                 emit=lambda v: {'analytics': {'mentalHealthTrends': v['trends'], 'mentalHealthDistribution': v['distribution']}},
+                 default={'trends': [], 'distribution': []}),
+    StatsSection('medical_bot', lambda f, i: get_medical_bot_analytics(*f.range(), f.gender, f.operation, f.user_names()),
+                 STATS_CACHE_TTL, ['Medical Assistance Bot'],
+                 emit=lambda v: {'analytics': {'medicalBotTrends': v['trends'], 'chatbotTrends': v['trends'],
+                                               'medicalBotCategories': v['categories']}},
+                 default={'trends': [], 'categories': []}),
+    StatsSection('disease_records', stats_records('disease'), STATS_CACHE_TTL, ['Disease Predictor'],
+                 emit=emit_records('disease', 'diseasealldata'), default=EMPTY_PAGE),
+    StatsSection('mental_health_records', stats_records('mental-health'), STATS_CACHE_TTL, ['Mental Health Analyzer'],
+                 emit=emit_records('mental-health', 'mentalalldata'), default=EMPTY_PAGE),
+    StatsSection('medical_bot_records', stats_records('medical-bot'), STATS_CACHE_TTL, ['Medical Assistance Bot'],
+                 emit=emit_records('medical-bot', 'medicalBotalldata'), default=EMPTY_PAGE),
+    StatsSection('feedback_records', stats_records('feedback'), STATS_RECENT_TTL, ['feedback'],
+                 emit=emit_records('feedback', 'feedbackalldata'), default=EMPTY_PAGE, filtered=False),
+    StatsSection('recent_logs', lambda f, i: get_recent_activity(), STATS_RECENT_TTL, ['user_logins', 'users'],
+                 emit=lambda v: {'recent_activity': {'recentLogs': v}}, default=[], filtered=False),
+    StatsSection('recent_disease', lambda f, i: get_recent_entries('Disease Predictor', 5), STATS_RECENT_TTL, ['Disease Predictor'],
+                 emit=lambda v: {'recent_activity': {'recentDiseasePredictions': v}}, default=[], filtered=False),
+    StatsSection('recent_mental_health', lambda f, i: get_recent_entries('Mental Health Analyzer', 5), STATS_RECENT_TTL,
+                 ['Mental Health Analyzer'], emit=lambda v: {'recent_activity': {'recentMentalHealth': v}}, default=[], filtered=False),
+    StatsSection('recent_medical_bot', lambda f, i: get_recent_entries('Medical Assistance Bot', 5), STATS_RECENT_TTL,
+                 ['Medical Assistance Bot'], emit=lambda v: {'recent_activity': {'recentMedicalBot': v}}, default=[], filtered=False),
+    StatsSection('recent_registrations',
+                 lambda f, i: get_recent_entries('registrations', 5, 'registeredAt', REGISTRATION_FIELDS),
+                 STATS_RECENT_TTL, ['registrations'],
+                 emit=lambda v: {'recent_activity': {'recentRegistrations': v}}, default=[], filtered=False),
+]}
+
+def resolve_sections(names):
+    """Return ``names`` plus every section they depend on, dependencies first"""
+    ordered, seen = [], set()
+
+    def visit(name):
+        if name not in seen:
+            seen.add(name)
+            for dependency in STATS_SECTIONS[name].depends:
+                visit(dependency)
+            ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+def section_collections(section):
+    """Collections read by ``section`` and the sections it depends on"""
+    collections = set(section.collections)
+    for dependency in section.depends:
+        collections |= section_collections(STATS_SECTIONS[dependency])
+    return collections
+
+def section_cache_key(section, filters):
+    key = f"stats:{section.name}"
+    stamp = counter_stamp(filters.counters(), section_collections(section))
+    if stamp:
+        key += f"@{stamp}"
+    return f"{key}:{filters.key}" if section.filtered else key
+
+def ensure_counter_watcher():
+    """Start the counters watcher, or restart it if its listener stopped"""
+    global counter_watcher
+    if COUNTER_WATCH == 'off':
+        return
+    with counter_watcher_lock:
+        if counter_watcher is not None and counter_watcher.active():
+            return
+        if counter_watcher is not None:
+            logger.warning("Counters watcher stopped, restarting")
+            counter_watcher.stop()
+        try:
+            counter_watcher = start_counter_watcher(db, counter_versions, COUNTER_WATCH, COUNTER_POLL_INTERVAL)
+        except Exception as e:
+            logger.error(f"Could not start counters watcher: {str(e)}")
+            counter_watcher = None
+
+def invalidate_sections(collection):
+    """Drop the cached unfiltered sections that read ``collection``"""
+    filters = StatsFilters()
+    for section in STATS_SECTIONS.values():
+        if collection in section_collections(section) and not section.filtered:
+            stats_cache.invalidate(section_cache_key(section, filters))
+
+def cached_section(section, filters, inputs):
+    """Return a section value from the stats cache, computing it when missing"""
+    ttl = section.ttl
+    if section.filtered and filters.historical:
+        ttl = max(ttl, STATS_CACHE_HISTORICAL_TTL)
+    if counters_cover(filters.counters(), section_collections(section)):
+        ttl = max(ttl, STATS_VERSIONED_TTL)
+    return stats_cache.get_or_compute(section_cache_key(section, filters),
+                                      lambda: section.compute(filters, inputs), ttl=ttl)
+
+def stats_counters(filters):
+    """Take the counters snapshot of a stats request, starting the watcher if needed"""
+    ensure_counter_watcher()
+    return filters.counters()
+
+def iter_stats_sections(names, filters):
+    """Yield ``(name, value, error)`` for the named sections and their dependencies as each finishes"""
+    stats_counters(filters)
+    ordered = resolve_sections(names)
+    builders = {name: partial(stats_section_builder, STATS_SECTIONS[name], filters) for name in ordered}
+    depends = {name: STATS_SECTIONS[name].depends for name in ordered}
+    for name, value, error in iter_sections(builders, depends):
+        yield name, STATS_SECTIONS[name].default if error else value, error
+
+def stats_section_builder(section, filters, inputs):
+    failed = [dep for dep, value in inputs.items() if value is None]
+    inputs = {dep: STATS_SECTIONS[dep].default if value is None else value for dep, value in inputs.items()}
+    if failed:
+        # Built on the defaults of failed dependencies: serve it, but never cache it
+        return section.compute(filters, inputs)
+    return cached_section(section, filters, inputs)
+
+def output_sections():
+    return [name for name, section in STATS_SECTIONS.items() if section.emit]
+
+def merge_fragment(response, fragment):
+    """Merge a section's ``{group: {key: value}}`` fragment into ``response``"""
+    for group, values in fragment.items():
+        target = response.setdefault(group, {})
+        for key, value in values.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                target[key].update(value)
+            else:
+                target[key] = dict(value) if isinstance(value, dict) else value
+
+def parse_sections(value):
+    """Output section names selected by ``value``, a list or comma-separated string; empty means all"""
+    available = output_sections()
+    if not value:
+        return available
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError("sections must be a list of names or a comma-separated string")
+    names = list(dict.fromkeys(name.strip() for name in value if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+    return names or available
+
+def build_stats_payload(filters, names=None):
+    """Assemble the /admin/stats payload from its cached sections (all output sections by default)"""
+    names = names or output_sections()
+    values, errors = {}, {}
+    for name, value, error in iter_stats_sections(names, filters):
+        values[name] = value
+        if error:
+            errors[name] = error
+    response = {'basic_stats': {}, 'analytics': {}, 'recent_activity': {}}
+    for name in names:
+        merge_fragment(response, STATS_SECTIONS[name].emit(values[name]))
+    if errors:
+        response["errors"] = errors
+    return response
+
+def stream_stats_payload(filters, names=None):
+    """Yield the /admin/stats payload as NDJSON lines, ending with a ``{"done": true}`` line"""
+    names = set(names or output_sections())
+    errors = {}
+    try:
+        for name, value, error in iter_stats_sections(sorted(names, key=lambda name: name != 'basic_stats'), filters):
+            if error:
+                errors[name] = error
+            if name in names:
+                yield app.json.dumps({'section': name, **STATS_SECTIONS[name].emit(value)}) + '\n'
+    except Exception as e:
+        logger.error(f"Streaming stats failed: {str(e)}", exc_info=True)
+        errors['stream'] = str(e)
+    yield app.json.dumps({'done': True, **({'errors': errors} if errors else {})}) + '\n'
+
+def stats_etag(filters, names):
+    """Strong ETag for the payload of the ``names`` sections, known before any of them runs"""
+    docs = stats_counters(filters)
+    collections = set().union(*(section_collections(STATS_SECTIONS[name]) for name in names))
+    parts = [counter_stamp(docs, collections), filters.key, ','.join(names), str(stats_cache.generation())]
+    if not counters_cover(docs, collections):
+        parts.append(str(int(time.time() // STATS_RECENT_TTL)))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def stats_not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def wants_ndjson():
+    """True if the client asked for the streamed NDJSON form of /admin/stats"""
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
 
 @app.route("/admin/stats", methods=["GET", "POST"])
-@cache.cached(timeout=300, unless=lambda: request.method == "POST")
 def get_stats():
     """Endpoint for admin statistics"""
     try:
-        now = datetime.now(tz)
-        timeframes = {
-            'today': now.replace(hour=0, minute=0, second=0, microsecond=0),
-            'week_ago': now - timedelta(days=7),
-            'month_ago': now - timedelta(days=30)
-        }
-
-        start_date = timeframes['month_ago']
-        end_date = now
-        gender = 'All'
-        
         if request.method == "POST":
             data = request.get_json() or {}
-            start_date_str = data.get('start_date')
-            end_date_str = data.get('end_date')
             gender = data.get('gender', 'All')
+            selection = data.get('sections')
             try:
-                if start_date_str:
-                    start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00')).astimezone(tz)
-                if end_date_str:
-                    end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00')).astimezone(tz)
-                if start_date > end_date:
+                start_date = parse_filter_date(data.get('start_date'))
+                end_date = parse_filter_date(data.get('end_date'))
+                now = datetime.now(tz)
+                if (start_date or now - timedelta(days=30)) > (end_date or now):
                     return jsonify({"error": "start_date cannot be after end_date"}), 400
                 if gender not in ['Male', 'Female', 'All']:
                     return jsonify({"error": "Invalid gender value"}), 400
             except (ValueError, TypeError) as e:
                 logger.warning(f"Invalid date format in POST request: {str(e)}")
                 return jsonify({"error": "Invalid date format. Use ISO 8601 (e.g., '2025-05-01T00:00:00Z')"}), 400
-            logger.info(f"Processing POST request with start_date: {start_date.isoformat()}, end_date: {end_date.isoformat()}, gender: {gender}")
+            logger.info(f"Processing POST request with start_date: {start_date}, end_date: {end_date}, gender: {gender}")
+            filters = StatsFilters.for_post(start_date, end_date, gender)
         else:
             logger.info("Processing GET request with default timeframes")
-
-        counters = {doc.id: doc.to_dict() for doc in db.collection('counters').get() if doc.exists}
-        total_users = len(list(db.collection('users').get()))
-        feedbacks = list(db.collection('feedback').stream())
-
-        disease_analytics = get_enhanced_disease_analytics(start_date, end_date, gender, request.method)
-        mental_health_analytics = get_mental_health_analytics(start_date, end_date, gender, request.method)
-        user_growth = get_user_growth_analytics(start_date, end_date)
-        medical_bot_data = get_medical_bot_analytics(start_date, end_date, gender, request.method)
-        user_analytics = get_user_analytics(start_date, end_date)
-        recent_logs = get_recent_activity()
-        feedback_comments = get_recent_feedback()
-        feedback_sentiment = analyze_feedback_sentiment()
-
-        response = {
-            "basic_stats": {
-                "total_users": total_users or 0,
-                "active_today": get_active_users_count(1) or 0,
-                "active_week": get_active_users_count(7) or 0,
-                "disease_predictions": counters.get('Disease Predictor', {}).get('count', 0),
-                "medical_condition_predictions": counters.get('Medical Assistance Bot', {}).get('count', 0),
-                "chatbot_interactions": counters.get('Medical Assistance Bot', {}).get('count', 0),
-                "mental_health_assessments": counters.get('Mental Health Analyzer', {}).get('count', 0),
-                "new_users_week": get_new_users_count(7) or 0,
-                "retention_rate": calculate_retention_rate(total_users) or 0.0,
-                "feedbacks": len(feedbacks)
-            },
-            "analytics": {
-                "diseaseTrends": disease_analytics['trends'],
-                "diseaseCategories": disease_analytics['categories'],
-                "diseaseRiskLevels": disease_analytics['risk_levels'],
-                "diseaseDoctors": disease_analytics['doctors'],
-                "diseaseMedicine": disease_analytics['cures'],
-                "diseasealldata": disease_analytics['structured_data'],
-                "mentalHealthTrends": mental_health_analytics['trends'],
-                "mentalalldata": mental_health_analytics['structured_data'],
-                "feedbackalldata": feedback_sentiment['structured_data'],
-                "mentalHealthDistribution": mental_health_analytics['distribution'],
-                "medicalBotTrends": medical_bot_data['trends'],
-                "chatbotTrends": medical_bot_data['trends'],
-                "medicalBotCategories": medical_bot_data['categories'],
-                "medicalBotalldata": medical_bot_data['structured_data'],
-                "userGrowth": user_growth,
-                "userActivity": user_analytics['activity'],
-                "feedbackSentiment": feedback_sentiment['sentiment']
-            }, 
-            "recent_activity": {
-                "recentLogs": recent_logs,
-                "feedback": feedback_comments,
-                "recentDiseasePredictions": get_recent_entries('Disease Predictor', 5),
-                "recentMentalHealth": get_recent_entries('Mental Health Analyzer', 5),
-                "recentMedicalBot": get_recent_entries('Medical Assistance Bot', 5),
-                "recentFeedbacks": get_recent_entries('feedback', 5),
-                "recentRegistrations": get_recent_entries('registrations', 5)
-            }
-        }
+            filters = StatsFilters()
+            selection = request.args.get('sections')
+        try:
+            names = parse_sections(selection)
+        except ValueError as e:
+            return jsonify({"error": str(e), "sections": output_sections()}), 400
+        if wants_ndjson():
+            # Read the counters before the 200 goes out, so a failure is still a 500
+            stats_counters(filters)
+            return Response(stream_with_context(stream_stats_payload(filters, names)), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no', 'Vary': 'Accept'})
+        if request.method == "GET":
+            etag = stats_etag(filters, names)
+            if request.if_none_match.contains(etag):
+                return stats_not_modified(etag)
+        response = build_stats_payload(filters, names)
         logger.info("Stats generated successfully")
-        return jsonify(response)
+        result = jsonify(response)
+        if request.method == "GET" and "errors" not in response:
+            result.set_etag(etag)
+            result.headers['Cache-Control'] = 'private, no-cache'
+            result.headers['Vary'] = 'Accept'
+        return result
     except Exception as e:
         logger.error(f"Stats generation failed: {str(e)}", exc_info=True)
         error_details = {
@@ -881,10 +1504,33 @@ def get_stats():
         }
         return jsonify(error_details), 500
 
+@app.route("/admin/stats/cache", methods=["GET"])
+def get_stats_cache_counters():
+    """Hit, stale and miss counters of the /admin/stats cache"""
+    return jsonify(stats_cache.counters())
+
+@app.cli.command('backfill-rollups')
+@click.option('--since', help="Only backfill events on or after this ISO 8601 date.")
+@click.option('--collection', 'collections', multiple=True, type=click.Choice(sorted(ROLLUP_SPECS)),
+              help="Collection to backfill (repeatable). Defaults to all rollup collections.")
+def backfill_rollups_command(since, collections):
+    """Build daily analytics rollups from existing history"""
+    since_date = datetime.fromisoformat(since.replace('Z', '+00:00')) if since else None
+    if since_date and since_date.tzinfo is None:
+        since_date = tz.localize(since_date)
+    written = backfill_rollups(db, tz, collections=list(collections) or None, since=since_date,
+                               iter_docs=iter_documents)
+    for collection, days in written.items():
+        click.echo(f"{collection}: {days} daily rollups written")
+
 # Shutdown Handler
 def shutdown_handler(signum=None, frame=None):
     logger.info("Shutting down gracefully...")
-    cache.clear()
+    stats_executor.shutdown(wait=False, cancel_futures=True)
+    prefetch_executor.shutdown(wait=False, cancel_futures=True)
+    stats_cache.shutdown()
+    if counter_watcher is not None:
+        counter_watcher.stop()
     sys.exit(0)
 
 atexit.register(shutdown_handler)
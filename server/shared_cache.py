@@ -0,0 +1,170 @@
+"""Key/value stores for the server's result caches.
+
+Both stores expose ``get(key)`` (None on a miss), ``set(key, value, ttl)``,
+``delete(key)`` and ``clear()``, plus a ``generation()`` number that
+``bump_generation()`` increases and that no eviction or ``clear()`` resets.
+:class:`MemoryStore` lives in one process; :class:`SQLiteStore` keeps entries
+in a SQLite file that every gunicorn worker on the host shares, without
+running Redis. Each consumer uses its own ``namespace`` (a table), so
+its entries are evicted and cleared independently. Values are pickled, so only
+trusted data should be stored.
+"""
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class MemoryStore:
+    """Per-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+
+class SQLiteConnections:
+    """Callable returning this thread's connection to the SQLite file at ``path``.
+
+    Connections run in WAL mode so worker processes on the same host can
+    share the file; the file's directory is created if needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __call__(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+class SQLiteStore:
+    """LRU store with per-entry expiry in a SQLite file shared across processes.
+
+    Hits are not written back one by one: their access times are batched and
+    flushed every ``touch_batch`` hits and before each ``set`` evicts.
+    """
+
+    def __init__(self, path, max_entries=1000, namespace='entries', touch_batch=64):
+        if not re.fullmatch(r'[A-Za-z_]\w*', namespace):
+            raise ValueError(f"Invalid cache namespace '{namespace}'")
+        self.path = path
+        self.max_entries = max_entries
+        self.table = namespace
+        self.touch_batch = touch_batch
+        self._touches = {}
+        self._touch_lock = threading.Lock()
+        self._connection = SQLiteConnections(path)
+        with self._connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                         "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                         "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS generations (namespace TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        if row is None:
+            return None
+        with self._touch_lock:
+            self._touches[key] = now
+            flush = len(self._touches) >= self.touch_batch
+        if flush:
+            self._flush_touches()
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry '{key}': {str(e)}")
+            self.delete(key)
+            return None
+
+    def _flush_touches(self):
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            with self._connection() as conn:
+                conn.executemany(f"UPDATE {self.table} SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                                 [(accessed_at, key) for key, accessed_at in touches.items()])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._flush_touches()
+        with self._connection() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                         (key, blob, now + ttl, now))
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            conn.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                         "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def generation(self):
+        row = self._connection().execute("SELECT value FROM generations WHERE namespace = ?", (self.table,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self):
+        with self._connection() as conn:
+            conn.execute("INSERT INTO generations (namespace, value) VALUES (?, 1) "
+                         "ON CONFLICT (namespace) DO UPDATE SET value = value + 1", (self.table,))
+
+def make_store(backend, path=None, max_entries=1000, namespace='entries'):
+    """Return the store named by ``backend``: 'memory' or 'sqlite'"""
+    if backend == 'sqlite':
+        return SQLiteStore(path, max_entries, namespace)
+    if backend == 'memory':
+        return MemoryStore(max_entries)
+    raise ValueError(f"Unknown cache backend '{backend}'")
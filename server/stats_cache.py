@@ -0,0 +1,109 @@
+"""Stale-while-revalidate cache with single-flight recomputation.
+
+An entry is *fresh* for ``ttl`` seconds and may then be served *stale* for
+another ``stale_ttl`` seconds while one background refresh replaces it.
+Concurrent misses on the same key wait for a single computation instead of
+each running their own::
+
+    payload = stats_cache.get_or_compute('stats:GET', build_payload)
+
+Entries are kept in a store from :mod:`shared_cache`; with the SQLite store
+every worker process sees the others' results.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from shared_cache import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+class StatsCache:
+    """Serve cached values immediately and recompute each key at most once at a time"""
+
+    def __init__(self, ttl=300, stale_ttl=3600, store=None, max_refresh_workers=2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.store = store or MemoryStore()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=max_refresh_workers,
+                                                    thread_name_prefix='stats-refresh')
+        self.hits = self.stale = self.misses = 0
+
+    def counters(self):
+        with self._lock:
+            return {'hits': self.hits, 'stale': self.stale, 'misses': self.misses,
+                    'inflight': len(self._inflight)}
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_or_compute(self, key, compute, ttl=None, cacheable=None):
+        """Return the cached value of ``key``, computing it with ``compute()`` if needed.
+
+        A stale value is returned as is and refreshed in the background.
+        ``ttl`` overrides the default freshness for this key; values for which
+        ``cacheable(value)`` is false are returned but not stored.
+        """
+        entry = self.store.get(key)
+        now = time.time()
+        if entry is not None:
+            value, fresh_until, _ = entry
+            if now < fresh_until:
+                self._count('hits')
+                return value
+            self._count('stale')
+            self._start(key, compute, ttl, cacheable, background=True)
+            return value
+        self._count('misses')
+        return self._start(key, compute, ttl, cacheable).result()
+
+    def _start(self, key, compute, ttl, cacheable, background=False):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = Future()
+        if background:
+            self._refresh_executor.submit(self._run, key, compute, ttl, cacheable, future)
+        else:
+            self._run(key, compute, ttl, cacheable, future)
+        return future
+
+    def _run(self, key, compute, ttl, cacheable, future):
+        try:
+            try:
+                value = compute()
+            except Exception as e:
+                logger.error(f"Recomputing cache entry '{key}' failed: {str(e)}", exc_info=True)
+                future.set_exception(e)
+                return
+            if cacheable is None or cacheable(value):
+                now = time.time()
+                ttl = self.ttl if ttl is None else ttl
+                try:
+                    self.store.set(key, (value, now + ttl, now + ttl + self.stale_ttl), ttl + self.stale_ttl)
+                except Exception as e:
+                    logger.warning(f"Storing cache entry '{key}' failed: {str(e)}", exc_info=True)
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def generation(self):
+        """Changes whenever an entry is invalidated, in any process sharing the store"""
+        return self.store.generation()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when ``key`` is None"""
+        if key is None:
+            self.store.clear()
+        else:
+            self.store.delete(key)
+        self.store.bump_generation()
+
+    def shutdown(self):
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,15 +1,43 @@
 import pytest
 import json
+import os
+import pickle
 from unittest.mock import patch, MagicMock
 
 @pytest.fixture
 def client():
+    # Keep the caches in memory, out of the working tree
+    os.environ.setdefault('CACHE_BACKEND', 'memory')
+    os.environ.setdefault('ROLLUP_CACHE_PATH', '')
     # Mock firebase setup before importing server
     with patch('firebase_admin.initialize_app'), patch('firebase_admin.credentials.Certificate'), patch('firebase_admin.firestore.client'):
-        from server import app
-        app.config['TESTING'] = True
-        with app.test_client() as client:
-            yield client
+        import server
+        from counter_watch import CounterVersions
+        server.app.config['TESTING'] = True
+        # No counters watcher thread outliving the test's fake database
+        try:
+            with patch.object(server, 'COUNTER_WATCH', 'off'), patch.object(server, 'counter_versions', CounterVersions()):
+                with server.app.test_client() as client:
+                    yield client
+        finally:
+            if server.counter_watcher is not None:
+                server.counter_watcher.stop()
+                server.counter_watcher = None
+
+@pytest.fixture
+def stats_db(client):
+    """A fake Firestore and an empty stats cache behind /admin/stats, as ``(fake, cache)``"""
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+    from stats_cache import StatsCache
+
+    fake, cache = FakeFirestore(), StatsCache()
+    try:
+        with patch.object(server, 'db', fake), patch.object(server, 'stats_cache', cache), \
+                patch.object(server, 'rollup_cache', None):
+            yield fake, cache
+    finally:
+        cache.shutdown()
 
 def test_health_check(client):
     """Test the /health endpoint"""
@@ -18,3 +46,719 @@ def test_health_check(client):
     data = json.loads(response.data)
     assert data['status'] == 'healthy'
     assert 'timestamp' in data
+
+def test_iter_sections_returns_partial_results(client):
+    """A failing section is reported without dropping the others"""
+    from server import iter_sections
+
+    def boom(inputs):
+        raise RuntimeError("firestore unavailable")
+
+    results = {name: (value, error) for name, value, error in iter_sections({'ok': lambda inputs: 42, 'broken': boom})}
+    assert results == {'ok': (42, None), 'broken': (None, 'firestore unavailable')}
+
+def test_iter_sections_times_out_each_section_from_its_start(client):
+    """Each section gets the full timeout from when it starts running; a slower one is abandoned"""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from server import iter_sections
+
+    release = threading.Event()
+    sections = {'first': lambda inputs: time.sleep(0.3) or 'first', 'second': lambda inputs: time.sleep(0.3) or 'second',
+                'slow': lambda inputs: release.wait(5)}
+    results = {name: (value, error) for name, value, error in
+               iter_sections(sections, {'second': ['first']}, timeout=0.5)}
+    release.set()
+    assert results['first'] == ('first', None) and results['second'] == ('second', None)
+    assert results['slow'][0] is None and 'Timed out' in results['slow'][1]
+
+    # Time spent queued behind a busy worker does not count against the timeout
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        queued = {name: error for name, _, error in iter_sections(
+            {'a': lambda inputs: time.sleep(0.3), 'b': lambda inputs: time.sleep(0.3)}, timeout=0.5, executor=executor)}
+    assert queued == {'a': None, 'b': None}
+
+def test_iter_sections_rejects_unknown_and_circular_dependencies(client):
+    """Bad dependency graphs raise before any section runs"""
+    from server import iter_sections
+
+    ran = []
+    sections = {'a': lambda inputs: ran.append('a'), 'b': lambda inputs: ran.append('b')}
+    with pytest.raises(ValueError, match='unknown'):
+        iter_sections(sections, {'a': ['missing']})
+    with pytest.raises(ValueError, match='Circular'):
+        iter_sections(sections, {'a': ['b'], 'b': ['a']})
+    assert ran == []
+    assert [name for name, _, _ in iter_sections(sections, {'b': ['a']})] == ['a', 'b']
+
+def test_merge_rollups_sums_days():
+    """Daily rollups merge into trends and per-dimension counts"""
+    from datetime import date
+    from rollups import add_to_rollup, empty_rollup, merge_rollups
+
+    first, second = empty_rollup('Disease Predictor', date(2025, 5, 1)), empty_rollup('Disease Predictor', date(2025, 5, 2))
+    add_to_rollup(first, 'Disease Predictor', {'disease': 'Flu', 'riskLevel': 'Low'})
+    add_to_rollup(second, 'Disease Predictor', {'disease': 'Flu'})
+    add_to_rollup(second, 'Disease Predictor', {'disease': 'Malaria', 'doctor': 'Physician'})
+
+    merged = merge_rollups({date(2025, 5, 1): first, date(2025, 5, 2): second})
+    assert merged['trends'] == {'2025-05-01': 1, '2025-05-02': 2}
+    assert merged['disease'] == {'Flu': 2, 'Malaria': 1}
+    assert merged['riskLevel'] == {'Low': 1, 'High': 2}
+    assert merged['doctor'] == {'Not Prescribed': 2, 'Physician': 1}
+
+def test_count_documents_prefers_counter_document(client):
+    """Counts come from the counters document before falling back to count()"""
+    import server
+
+    query = MagicMock()
+    with patch.object(server, 'db') as db:
+        db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=True, to_dict=lambda: {'count': 12})
+        assert server.count_documents(query, 'users') == 12
+        query.count.assert_not_called()
+
+        db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=False)
+        query.count.return_value.get.return_value = [[MagicMock(value=7)]]
+        assert server.count_documents(query, 'users') == 7
+
+def test_get_user_emails_batches_and_caches(client):
+    """User emails are fetched once per distinct id and then served from the LRU"""
+    import server
+
+    server.user_email_cache.clear()
+    with patch.object(server, 'db') as db:
+        db.collection.return_value.document.side_effect = lambda user_id: user_id
+        db.get_all.side_effect = lambda refs, field_paths=None: [
+            MagicMock(id=ref, exists=True, to_dict=lambda ref=ref: {'email': f'{ref}@example.com'}) for ref in refs]
+
+        assert server.get_user_emails(['a', 'b', 'a']) == {'a': 'a@example.com', 'b': 'b@example.com'}
+        assert db.get_all.call_count == 1
+        assert list(db.get_all.call_args[0][0]) == ['a', 'b']
+
+        assert server.get_user_emails(['b']) == {'b': 'b@example.com'}
+        assert db.get_all.call_count == 1
+
+def test_medical_bot_day_range_matches_day_filter(client):
+    """The pushed-down chatbot range keeps exactly the documents the old day filter kept"""
+    from datetime import datetime, timedelta
+    from server import medical_bot_day_range, tz
+
+    base = tz.localize(datetime(2025, 6, 10))
+    docs = [base + timedelta(minutes=17 * i) for i in range(600)]
+    for start_offset, end_offset in [(0, 3000), (25, 4000), (32, 2879), (700, 701), (1500, 6000)]:
+        start_date, end_date = base + timedelta(minutes=start_offset), base + timedelta(minutes=end_offset)
+        start, end = medical_bot_day_range(start_date, end_date)
+        for date in docs:
+            day_start = datetime.strptime(date.astimezone(tz).strftime('%Y-%m-%d'), '%Y-%m-%d').replace(tzinfo=tz)
+            assert (start <= date <= end) == (start_date <= day_start <= end_date)
+
+def test_medical_bot_analytics_reads_only_the_range(client):
+    """A filtered chatbot request reads only documents inside the range"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for days in range(60):
+        fake.collection('Medical Assistance Bot').add({'userName': 'a', 'date': now - timedelta(days=days), 'categroryQuestion': 'symptoms'})
+    with patch.object(server, 'db', fake), patch.object(server, 'ROLLUPS_ENABLED', False):
+        result = server.get_medical_bot_analytics(now - timedelta(days=10), now, 'All', 'POST')
+    assert sum(item['count'] for item in result['trends']) == fake.reads == 10
+
+def test_iter_documents_pages_with_projection(client):
+    """The shared iterator walks every page in order and downloads only selected fields"""
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    for i in range(10):
+        fake.collection('feedback').document(f'doc{i:02d}').set({'date': i, 'message': f'm{i}', 'email': 'e'})
+    query = fake.collection('feedback').order_by('date')
+
+    docs = list(server.iter_documents(query, page_size=3, fields=['date', 'message']))
+    assert [doc.to_dict() for doc in docs] == [{'date': i, 'message': f'm{i}'} for i in range(10)]
+    assert fake.queries == 4
+
+    assert [doc.id for doc in server.iter_documents(query, page_size=3, limit=5, prefetch=False)] == [f'doc{i:02d}' for i in range(5)]
+
+def test_aggregation_engine_single_pass():
+    """Every registered aggregator sees the same prepared rows in one pass"""
+    from aggregation import AggregationEngine, Aggregator, CountByDay, CountByField, DistinctCount, FilteredCount, TopK
+
+    rows = [
+        {'day': '2025-05-02', 'disease': 'Flu', 'userName': 'a', 'riskLevel': 'Low'},
+        {'day': '2025-05-01', 'disease': 'Malaria', 'userName': 'b'},
+        {'day': '2025-05-02', 'disease': 'Flu', 'userName': 'a', 'riskLevel': 'Low'},
+        {'day': None, 'disease': 'Cold', 'userName': 'c'},
+    ]
+    results = AggregationEngine({
+        'trends': CountByDay(),
+        'top': TopK('disease', 1),
+        'risk': CountByField('riskLevel', default='High'),
+        'users': DistinctCount('userName'),
+        'low': FilteredCount(lambda row: row.get('riskLevel') == 'Low'),
+    }, prepare=lambda row: row if row['day'] else None).feed(iter(rows)).results()
+
+    assert results['trends'] == {'2025-05-01': 1, '2025-05-02': 2}
+    assert results['top'] == [('Flu', 2)]
+    assert results['risk'] == {'Low': 2, 'High': 1}
+    assert results['users'] == 2
+    assert results['low'] == 2
+    with pytest.raises(TypeError):
+        Aggregator()
+
+def test_day_bucketer_matches_timezone_conversion():
+    """Day numbers agree with astimezone() across a DST change and outside the range"""
+    from datetime import date, datetime, timedelta
+    import numpy as np
+    import pytz
+    from aggregation import DayBucketer
+
+    tz = pytz.timezone('America/New_York')
+    bucketer = DayBucketer(tz, date(2025, 3, 5), date(2025, 3, 15))
+    start = datetime(2025, 3, 1, tzinfo=pytz.UTC)
+    stamps = [start + timedelta(minutes=37 * i) for i in range(1000)]
+
+    indexes = bucketer.indexes(np.array([stamp.timestamp() for stamp in stamps]))
+    for stamp, index in zip(stamps, indexes.tolist()):
+        if index == DayBucketer.MISSING:
+            index = bucketer.index(stamp)
+        assert bucketer.label(index) == stamp.astimezone(tz).strftime('%Y-%m-%d')
+    assert bucketer.index('2025-03-10T03:59:00Z') == 4
+    assert bucketer.index(None) is None
+
+def test_feedback_sentiment_matches_words_and_caches(client):
+    """Whole words decide the sentiment; unedited documents are not reclassified"""
+    import server
+
+    assert server.classify_sentiment('A first-class experience') == 'positive'
+    assert server.classify_sentiment('The doctor told me to wait') == 'neutral'
+    assert server.classify_sentiment('Booking was not-bad but slow') == 'negative'
+
+    doc = MagicMock(id='fb1', update_time=1)
+    assert server.feedback_sentiment(doc, 'great app') == 'positive'
+    with patch('server.classify_sentiment') as classify:
+        assert server.feedback_sentiment(doc, 'great app') == 'positive'
+        classify.assert_not_called()
+        doc.update_time = 2
+        server.feedback_sentiment(doc, 'awful app')
+        classify.assert_called_once_with('awful app')
+
+def test_feedback_analytics_reads_each_document_once(client):
+    """Count, sentiment and both recent lists come from a single scan"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for i in range(30):
+        fake.collection('feedback').add({'name': f'n{i}', 'email': 'e', 'message': 'great' if i % 2 else 'meh', 'date': now - timedelta(hours=i)})
+    with patch.object(server, 'db', fake):
+        result = server.get_feedback_analytics()
+    assert fake.reads == result['count'] == 30
+    assert result['sentiment'] == [{'name': 'Positive', 'count': 15}, {'name': 'Neutral', 'count': 15}, {'name': 'Negative', 'count': 0}]
+    assert [comment['name'] for comment in result['comments']] == [f'n{i}' for i in range(20)]
+    assert [entry['name'] for entry in result['recent']] == [f'n{i}' for i in range(5)]
+
+def test_user_timeline_shares_scans(client):
+    """Growth is the running sum of daily sign-ups; logins are read once for activity and active users"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for i in range(12):
+        fake.collection('users').add({'createdAt': now - timedelta(days=i // 3, minutes=1)})
+    for i in range(40):
+        fake.collection('user_logins').add({'userId': f'u{i % 7}', 'timestamp': now - timedelta(days=i, minutes=1)})
+
+    with patch.object(server, 'db', fake), patch.object(server, 'ROLLUPS_ENABLED', False):
+        timeline = server.get_user_timeline(now - timedelta(days=30), now)
+        logins_read = fake.reads - 12
+        expected = server.get_active_user_windows()
+
+    assert [day['count'] for day in timeline['trends']] == [3, 3, 3, 3]
+    assert [day['count'] for day in timeline['growth']] == [3, 6, 9, 12]
+    assert sum(day['count'] for day in timeline['activity']) == 30
+    assert timeline['active_users'] == expected
+    assert logins_read == 30
+
+def test_active_user_windows_share_one_login_scan(client):
+    """Distinct users for the 1, 7 and 30 day windows come from one user_logins scan"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for user, age in [('u1', timedelta(hours=1)), ('u1', timedelta(days=5)), ('u2', timedelta(days=3)),
+                      ('u3', timedelta(days=10)), ('u3', timedelta(days=20)), ('u4', timedelta(days=40))]:
+        fake.collection('user_logins').add({'userId': user, 'timestamp': now - age})
+    with patch.object(server, 'db', fake):
+        windows = server.get_active_user_windows()
+    assert windows == {1: 1, 7: 2, 30: 3}
+    assert fake.queries == 1 and fake.reads == 5
+
+    basic = server.stats_basic(None, {'counters': {}, 'user_counts': {'total_users': 4, 'new_users_week': 0},
+                                      'user_timeline': {'active_users': windows}, 'feedback_count': 0})
+    assert (basic['active_today'], basic['active_week'], basic['active_month']) == (1, 2, 3)
+
+def test_gender_index_builds_tops_up_and_rebuilds(client):
+    """The index is built once, topped up with newer registrations after ttl and rebuilt after max_age"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    registrations = fake.collection('registrations')
+    now = datetime.now(server.tz)
+    for i in range(4):
+        registrations.add({'name': f'u{i}', 'gender': ['male', 'female'][i % 2], 'registeredAt': now - timedelta(days=i)})
+    clock = [1000.0]
+    index = server.GenderIndex(ttl=60, max_age=3600)
+    with patch.object(server, 'db', fake), patch.object(server.time, 'monotonic', lambda: clock[0]):
+        assert index.names('Male') == {'u0', 'u2'} and index.names('female') == {'u1', 'u3'}
+        assert fake.reads == 4
+
+        registrations.add({'name': 'u4', 'gender': 'male', 'registeredAt': now + timedelta(minutes=1)})
+        assert index.names('Male') == {'u0', 'u2'}
+        clock[0] += 61
+        fake.reset_counters()
+        assert index.names('Male') == {'u0', 'u2', 'u4'}
+        assert fake.reads == 1
+
+        registrations.document(next(doc_id for doc_id, data in registrations.docs.items() if data['name'] == 'u0')).set(
+            {'name': 'u0', 'gender': 'female', 'registeredAt': now})
+        clock[0] += 3600
+        assert index.names('Male') == {'u2', 'u4'} and index.names('Female') == {'u0', 'u1', 'u3'}
+
+def test_records_endpoint_pages_with_cursor(client):
+    """Following next_cursor walks every matching row exactly once, in order"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for i in range(23):
+        fake.collection('Mental Health Analyzer').add({'userName': 'a', 'serialNo': 100 - i, 'date': now - timedelta(hours=i)})
+    with patch.object(server, 'db', fake):
+        serials, cursor = [], None
+        while True:
+            response = client.get('/admin/records/mental-health', query_string={'cursor': cursor} if cursor else {'page_size': 10, 'sort': 'serialNo', 'order': 'asc'})
+            assert response.status_code == 200
+            page = response.get_json()
+            serials += [row['serialNo'] for row in page['records']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        assert serials == list(range(78, 101))
+
+        assert client.get('/admin/records/mental-health?page_size=0').status_code == 400
+        assert client.get('/admin/records/feedback?sort=serialNo').status_code == 400
+        assert client.get('/admin/records/feedback?cursor=bogus').status_code == 400
+        assert client.get('/admin/records/unknown').status_code == 404
+
+def test_records_columnar_format_matches_rows(client):
+    """format=columnar carries the same rows as arrays, with dictionary-encoded low-cardinality columns"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for i in range(7):
+        fake.collection('Disease Predictor').add({'userName': f'u{i}', 'serialNo': i, 'date': now - timedelta(hours=i),
+                                                  'disease': ['Flu', 'Cold'][i % 2], 'doctor': 'Dr. A', 'riskLevel': 'Low'})
+    with patch.object(server, 'db', fake):
+        rows = client.get('/admin/records/disease').get_json()
+        columnar = client.get('/admin/records/disease?format=columnar').get_json()
+        assert client.get('/admin/records/disease?format=xml').status_code == 400
+    assert columnar['rowCount'] == len(rows['records']) == 7
+    assert [row['serialNo'] for row in rows['records']] == list(range(7))
+    assert columnar['dictionaries']['disease'] == ['Flu', 'Cold'] and columnar['dictionaries']['doctor'] == ['Dr. A']
+    decoded = [{column: values[i] for column, values in columnar['columns'].items()} for i in range(columnar['rowCount'])]
+    for row in decoded:
+        for column, dictionary in columnar['dictionaries'].items():
+            row[column] = dictionary[row[column]]
+    assert decoded == rows['records']
+
+def test_stats_cache_single_flight_and_stale():
+    """Concurrent misses share one computation; stale entries are served while refreshing"""
+    import threading
+    import time
+    from stats_cache import StatsCache
+
+    cache = StatsCache(ttl=60, stale_ttl=60)
+    calls, release = [], threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 5 and len(calls) == 1
+
+    value, fresh_until, stale_until = cache.store.get('k')
+    cache.store.set('k', (value, time.time() - 1, stale_until), 60)
+    assert cache.get_or_compute('k', lambda: 'new') == 1
+    deadline = time.time() + 5
+    while cache.store.get('k')[0] != 'new' and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_compute('k', lambda: 'unused') == 'new'
+    assert cache.counters() == {'hits': 1, 'stale': 1, 'misses': 5, 'inflight': 0}
+    cache.shutdown()
+
+def test_stats_cache_returns_value_when_store_fails():
+    """A store that cannot save the entry still returns the computed value"""
+    from shared_cache import MemoryStore
+    from stats_cache import StatsCache
+
+    store = MemoryStore()
+    cache = StatsCache(store=store)
+    with patch.object(store, 'set', side_effect=OSError('disk full')):
+        assert cache.get_or_compute('k', lambda: 42) == 42
+    assert cache.counters()['inflight'] == 0 and store.get('k') is None
+    cache.shutdown()
+
+def test_stats_sections_cached_per_day_range(client, stats_db):
+    """POST filters covering the same days reuse every section; historical windows get the long TTL"""
+    from datetime import datetime, timedelta
+    import server
+
+    fake, cache = stats_db
+    now = datetime.now(server.tz)
+    fake.collection('Disease Predictor').add({'userName': 'a', 'date': now - timedelta(days=3), 'disease': 'Flu'})
+    body = {'start_date': (now - timedelta(days=10)).isoformat(), 'end_date': now.isoformat()}
+    first = client.post('/admin/stats', json=body).get_json()
+    fake.reset_counters()
+    misses = cache.counters()['misses']
+    body = {'start_date': (now - timedelta(days=10, seconds=-5)).isoformat(), 'end_date': (now + timedelta(seconds=5)).isoformat()}
+    assert client.post('/admin/stats', json=body).get_json() == first
+    assert fake.reads == 0 and cache.counters()['misses'] == misses
+
+    # Unfiltered sections are shared with GET; only the filtered ones are computed again
+    client.get('/admin/stats')
+    filtered = [s for s in server.STATS_SECTIONS.values() if s.filtered]
+    assert cache.counters()['misses'] == misses + len(filtered)
+
+    body = {'start_date': (now - timedelta(days=10)).isoformat(), 'end_date': (now - timedelta(days=2)).isoformat(), 'gender': 'All'}
+    client.post('/admin/stats', json=body)
+    historical = cache.store.get(f"stats:disease:POST:{(now - timedelta(days=10)).date()}:{(now - timedelta(days=2)).date()}:All")
+    assert historical[1] - datetime.now().timestamp() > server.STATS_RECENT_TTL
+    recent = cache.store.get("stats:recent_logs")
+    assert recent[1] - datetime.now().timestamp() <= server.STATS_RECENT_TTL
+
+def test_counter_changes_invalidate_only_affected_sections(client, stats_db):
+    """A changed counter re-keys the sections reading that collection; the rest stay cached"""
+    from datetime import datetime
+    import server
+    from counter_watch import CounterVersions, PollingCounterWatcher
+
+    fake, cache = stats_db
+    versions = CounterVersions()
+    now = datetime.now(server.tz)
+    for name in ['Disease Predictor', 'Mental Health Analyzer', 'Medical Assistance Bot', 'users', 'user_logins']:
+        fake.collection('counters').document(name).set({'count': 0})
+    watcher = PollingCounterWatcher(fake, versions)
+    with patch.object(server, 'counter_versions', versions):
+        watcher.poll()
+        client.get('/admin/stats')
+        fake.collection('Disease Predictor').add({'userName': 'a', 'date': now, 'disease': 'Flu'})
+        fake.collection('counters').document('Disease Predictor').set({'count': 1})
+        assert watcher.poll() == {'Disease Predictor'}
+
+        misses = cache.counters()['misses']
+        data = client.get('/admin/stats').get_json()
+        affected = [s for s in server.STATS_SECTIONS.values()
+                    if server.section_collections(s) & {'Disease Predictor', 'counters'}]
+        assert len(affected) < len(server.STATS_SECTIONS) / 2
+        assert cache.counters()['misses'] == misses + len(affected)
+        assert data['basic_stats']['disease_predictions'] == 1
+        assert len(data['analytics']['diseasealldata']) == 1
+
+def test_unchanged_stats_answer_304_after_one_read(client, stats_db):
+    """A matching If-None-Match is answered from the counters alone; invalidation changes the ETag"""
+    fake, cache = stats_db
+    fake.collection('counters').document('Disease Predictor').set({'count': 3})
+    first = client.get('/admin/stats')
+    etag = first.headers['ETag']
+    fake.reset_counters()
+    cached = client.get('/admin/stats', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert fake.reads == 1
+
+    fake.collection('counters').document('Disease Predictor').set({'count': 4})
+    assert client.get('/admin/stats', headers={'If-None-Match': etag}).status_code == 200
+    etag = client.get('/admin/stats').headers['ETag']
+    cache.invalidate('stats:feedback')
+    assert client.get('/admin/stats', headers={'If-None-Match': etag}).status_code == 200
+
+def test_etag_and_body_follow_counters_without_watcher(client, stats_db):
+    """With no live watcher, a counter change while a section is cached gives a fresh body under the new ETag"""
+    fake, _ = stats_db
+    fake.collection('counters').document('Disease Predictor').set({'count': 3})
+    first = client.get('/admin/stats?sections=basic_stats')
+    assert first.get_json()['basic_stats']['disease_predictions'] == 3
+
+    fake.collection('counters').document('Disease Predictor').set({'count': 4})
+    second = client.get('/admin/stats?sections=basic_stats', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200 and second.get_json()['basic_stats']['disease_predictions'] == 4
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert client.get('/admin/stats?sections=basic_stats',
+                      headers={'If-None-Match': second.headers['ETag']}).status_code == 304
+
+def test_recent_registrations_leave_credentials_out(client, stats_db):
+    """Recent registrations are projected to display fields before they reach the response or the cache"""
+    from datetime import datetime
+    import server
+
+    fake, cache = stats_db
+    fake.collection('registrations').document('u1').set({
+        'serialNo': 1, 'userId': 'u1', 'name': 'Ana', 'gender': 'Female', 'email': 'ana@example.com',
+        'password': 'hunter2', 'registeredAt': datetime.now(server.tz)})
+    response = client.get('/admin/stats?sections=recent_registrations')
+    [entry] = response.get_json()['recent_activity']['recentRegistrations']
+    assert entry['name'] == 'Ana' and entry['timestamp']
+    assert 'password' not in entry and 'email' not in entry
+    assert b'hunter2' not in pickle.dumps(cache.store.get('stats:recent_registrations'))
+
+def test_stats_stream_ndjson_merges_to_json_payload(client, stats_db):
+    """Accept: application/x-ndjson streams one line per section; merged, they equal the JSON payload"""
+    import server
+
+    fake, _ = stats_db
+    fake.collection('feedback').add({'message': 'great app', 'date': server.datetime.now(server.tz)})
+    streamed = client.get('/admin/stats', headers={'Accept': 'application/x-ndjson'})
+    assert streamed.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in streamed.get_data(as_text=True).splitlines()]
+    expected = client.get('/admin/stats').get_json()
+    assert lines[-1] == {'done': True}
+    sections = [line.pop('section') for line in lines[:-1]]
+    assert sorted(sections) == sorted(server.output_sections())
+    merged = {'basic_stats': {}, 'analytics': {}, 'recent_activity': {}}
+    for line in lines[:-1]:
+        server.merge_fragment(merged, line)
+    assert merged == expected
+
+def test_stats_counters_failure_is_500_before_streaming(client, stats_db):
+    """A counters read that fails answers 500 on both the JSON and the NDJSON path"""
+    import server
+
+    with patch.object(server, 'read_counters', side_effect=RuntimeError('counters down')):
+        assert client.get('/admin/stats').status_code == 500
+        streamed = client.get('/admin/stats', headers={'Accept': 'application/x-ndjson'})
+        assert streamed.status_code == 500
+
+def test_stats_failed_scan_is_reported_and_not_cached(client, stats_db):
+    """A failing login scan shows up in ``errors``; neither it nor basic_stats built on it is cached"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeQuery
+
+    fake, _ = stats_db
+    now = datetime.now(server.tz)
+    for user in range(5):
+        fake.collection('user_logins').add({'userId': f'u{user}', 'timestamp': now - timedelta(hours=1)})
+    stream = FakeQuery.stream
+
+    def failing(query):
+        if query._collection.name == 'user_logins':
+            raise RuntimeError('deadline exceeded')
+        return stream(query)
+
+    with patch.object(FakeQuery, 'stream', failing):
+        failed = client.get('/admin/stats?sections=basic_stats').get_json()
+    assert failed['basic_stats']['active_today'] == 0 and 'user_timeline' in failed['errors']
+    recovered = client.get('/admin/stats?sections=basic_stats').get_json()
+    assert recovered['basic_stats']['active_today'] == 5 and 'errors' not in recovered
+
+def test_stats_stream_ends_with_done_line_after_failure(client, stats_db):
+    """A failure mid-stream still ends the NDJSON body with a done line carrying the error"""
+    import server
+
+    def failing(names, filters):
+        yield 'basic_stats', server.STATS_SECTIONS['basic_stats'].default, None
+        raise RuntimeError('executor gone')
+
+    with patch.object(server, 'iter_stats_sections', failing):
+        streamed = client.get('/admin/stats', headers={'Accept': 'application/x-ndjson'})
+    lines = [json.loads(line) for line in streamed.get_data(as_text=True).splitlines()]
+    assert lines[0]['section'] == 'basic_stats'
+    assert lines[-1] == {'done': True, 'errors': {'stream': 'executor gone'}}
+
+def test_stats_sections_selection_runs_only_requested_scans(client, stats_db):
+    """?sections= runs the selected builders and their dependencies only; unknown names are rejected"""
+    from datetime import datetime, timedelta
+    import server
+
+    fake, cache = stats_db
+    now = datetime.now(server.tz)
+    for minutes in range(20):
+        fake.collection('user_logins').add({'userId': 'u1', 'timestamp': now - timedelta(minutes=minutes)})
+    fake.collection('Disease Predictor').add({'userName': 'a', 'date': now, 'disease': 'Flu'})
+    data = client.get('/admin/stats?sections=disease,disease_records').get_json()
+    selected_reads = fake.reads
+    assert sorted(data['analytics']) == ['diseaseCategories', 'diseaseDoctors', 'diseaseMedicine',
+                                         'diseaseRiskLevels', 'diseaseTrends', 'diseasealldata', 'recordCursors']
+    assert data['basic_stats'] == {} and data['recent_activity'] == {}
+
+    data = client.post('/admin/stats', json={'sections': ['basic_stats', 'user_timeline']}).get_json()
+    assert data['basic_stats']['active_today'] == 1 and 'userGrowth' in data['analytics']
+
+    response = client.get('/admin/stats?sections=disease,counters')
+    assert response.status_code == 400 and 'counters' in response.get_json()['error']
+
+    # Every section scans the 20 logins at least once more
+    cache.invalidate()
+    fake.reset_counters()
+    client.get('/admin/stats')
+    assert fake.reads >= selected_reads + 20
+
+def test_basic_stats_counts_feedback_without_scanning_it(client, stats_db):
+    """basic_stats takes the feedback total from a server-side count, not the feedback scan"""
+    import server
+    from benchmarks.fake_firestore import FakeQuery
+
+    fake, _ = stats_db
+    for i in range(30):
+        fake.collection('feedback').add({'message': f'note {i}', 'date': server.datetime.now(server.tz)})
+    stream, scanned = FakeQuery.stream, []
+
+    def recording(query):
+        scanned.append(query._collection.name)
+        return stream(query)
+
+    with patch.object(FakeQuery, 'stream', recording):
+        data = client.get('/admin/stats?sections=basic_stats').get_json()
+    assert data['basic_stats']['feedbacks'] == 30
+    assert 'feedback' not in scanned and fake.aggregations >= 1
+
+def test_local_rollup_cache_serves_closed_days(tmp_path):
+    """A cold 90-day range is rebuilt with one scan; once warm it reads only today's raw events"""
+    from datetime import datetime, timedelta
+    import pytz
+    from benchmarks.fake_firestore import FakeFirestore
+    from rollups import LocalRollupCache, merge_rollups, rollups_for_range
+
+    tz = pytz.timezone('Asia/Karachi')
+    fake, local = FakeFirestore(), LocalRollupCache(str(tmp_path / 'rollups.sqlite3'))
+    now = datetime.now(tz)
+    today_start = tz.localize(datetime(now.year, now.month, now.day))
+    for day in range(90):
+        fake.collection('Mental Health Analyzer').add({'date': today_start - timedelta(days=day), 'condition': 'normal'})
+    start = today_start - timedelta(days=89)
+
+    cold = merge_rollups(rollups_for_range(fake, 'Mental Health Analyzer', start, now, tz, local))
+    assert fake.queries == 2
+    fake.reset_counters()
+    warm = merge_rollups(rollups_for_range(fake, 'Mental Health Analyzer', start, now, tz, local))
+    assert warm == cold and sum(warm['trends'].values()) == 90
+    assert fake.reads == 1
+
+def test_backfill_rollups_widens_since_to_whole_days(client):
+    """A mid-day ``since`` still backfills that whole day, paging through iter_docs"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+    from rollups import backfill_rollups, rollup_id
+
+    fake, tz = FakeFirestore(), server.tz
+    now = datetime.now(tz)
+    day_start = tz.localize(datetime(now.year, now.month, now.day)) - timedelta(days=3)
+    for hours in (1, 2, 20, 30):
+        fake.collection('Mental Health Analyzer').add({'date': day_start + timedelta(hours=hours), 'condition': 'normal'})
+    pages = []
+    iter_docs = lambda query: pages.append(1) or server.iter_documents(query, page_size=2)
+
+    written = backfill_rollups(fake, tz, ['Mental Health Analyzer'], since=day_start + timedelta(hours=12),
+                               iter_docs=iter_docs)
+    first = fake.collection('analytics_rollups').document(rollup_id('Mental Health Analyzer', day_start.date())).get()
+    assert written == {'Mental Health Analyzer': 3} and pages == [1]
+    assert first.to_dict()['count'] == 3 and first.to_dict()['closed']
+
+def test_disease_breakdowns_order_alike_from_rollups_and_raw(client):
+    """Risk levels, doctors and cures list by count, then name, with or without rollups"""
+    from datetime import datetime, timedelta
+    import server
+    from benchmarks.fake_firestore import FakeFirestore
+
+    fake = FakeFirestore()
+    now = datetime.now(server.tz)
+    for i, (risk, doctor) in enumerate([('Low', 'Neurologist'), ('High', 'Physician'), ('High', 'Physician'),
+                                        ('Medium', 'Cardiologist')]):
+        fake.collection('Disease Predictor').add({'date': now - timedelta(days=i + 1), 'disease': 'Flu',
+                                                  'riskLevel': risk, 'doctor': doctor, 'cures': 'Rest'})
+    start = now - timedelta(days=10)
+    with patch.object(server, 'db', fake), patch.object(server, 'rollup_cache', None):
+        with patch.object(server, 'ROLLUPS_ENABLED', True):
+            rolled = server.get_enhanced_disease_analytics(start, now)
+        with patch.object(server, 'ROLLUPS_ENABLED', False):
+            raw = server.get_enhanced_disease_analytics(start, now)
+    assert [entry['name'] for entry in raw['risk_levels']] == ['High', 'Low', 'Medium']
+    for key in ('risk_levels', 'doctors', 'cures'):
+        assert rolled[key] == raw[key]
+
+def test_sqlite_store_is_shared_with_lru_and_ttl(tmp_path):
+    """Two stores on one file see each other's entries; old and expired entries are dropped"""
+    from datetime import datetime
+    from shared_cache import SQLiteStore
+
+    path = str(tmp_path / 'shared.sqlite3')
+    first, second = SQLiteStore(path, max_entries=2), SQLiteStore(path, max_entries=2, touch_batch=1)
+    first.set('a', {'when': datetime(2025, 5, 1)}, 60)
+    assert second.get('a') == {'when': datetime(2025, 5, 1)}
+
+    first.set('b', 2, 60)
+    second.get('a')
+    first.set('c', 3, 60)
+    assert second.get('b') is None and first.get('a') is not None and first.get('c') == 3
+
+    first.set('d', 4, -1)
+    assert second.get('d') is None
+
+def test_sqlite_store_batches_lru_touches(tmp_path):
+    """Hits are written back in batches, and always before a set evicts"""
+    from shared_cache import SQLiteStore
+
+    store = SQLiteStore(str(tmp_path / 'shared.sqlite3'), max_entries=2, touch_batch=2)
+    accessed = lambda: dict(store._connection().execute(f"SELECT key, accessed_at FROM {store.table}"))
+    store.set('a', 1, 60)
+    store.set('b', 2, 60)
+    before = accessed()
+    store.get('a')
+    assert accessed() == before
+    store.set('c', 3, 60)
+    assert store.get('b') is None and store.get('a') == 1
+    written = accessed()
+    store.get('c')
+    assert accessed()['a'] > written['a']
+
+def test_sqlite_store_namespaces_and_generation(tmp_path):
+    """Namespaces evict and clear separately; the generation survives eviction and clear"""
+    from shared_cache import SQLiteStore
+
+    path = str(tmp_path / 'shared.sqlite3')
+    stats, answers = SQLiteStore(path, 1, namespace='stats'), SQLiteStore(path, 1, namespace='inference')
+    stats.set('a', 1, 60)
+    answers.set('a', 'answer', 60)
+    answers.set('b', 'other answer', 60)
+    assert stats.get('a') == 1 and answers.get('a') is None
+
+    stats.bump_generation()
+    stats.set('b', 2, 60)
+    stats.clear()
+    assert stats.get('b') is None and answers.get('b') == 'other answer'
+    assert SQLiteStore(path, namespace='stats').generation() == 1 and answers.generation() == 0